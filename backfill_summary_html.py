@@ -0,0 +1,22 @@
+from webapp import create_app
+from webapp.models import db, StockData
+from markdown import render_summary_html
+
+app = create_app()
+
+def backfill_summary_html():
+    """Renders summary_html / summary_html_no_headings for summaries saved before those columns existed."""
+    with app.app_context():
+        stocks = StockData.query.filter(
+            StockData.summary_text != None,
+            StockData.summary_html == None
+        ).all()
+
+        for stock in stocks:
+            stock.summary_html, stock.summary_html_no_headings = render_summary_html(stock.summary_text)
+
+        db.session.commit()
+        print(f"✅ Rendered summary HTML for {len(stocks)} stocks.")
+
+if __name__ == "__main__":
+    backfill_summary_html()
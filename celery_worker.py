@@ -2,6 +2,7 @@ from celery import Celery
 from celery.schedules import crontab
 from main import main  # Import your existing main() function
 from webapp import create_app
+from config import Config
 import pytz
 import datetime  # <-- Add this import
 
@@ -9,7 +10,7 @@ import datetime  # <-- Add this import
 
 # Setup Flask app and Celery configuration
 app = create_app()
-celery = Celery(app.name, broker='redis://localhost:6379/0')  # Using Redis as the broker
+celery = Celery(app.name, broker=Config.REDIS_URL)  # Using Redis as the broker
 
 # Use California time zone (PST/PDT)
 celery.conf.update(timezone='US/Pacific')
@@ -20,7 +21,51 @@ def run_main():
     """Run the main function"""
     main()  # Call your existing main() function
     print("Main function completed.")
-    
+
+@celery.task
+def run_news_retention():
+    """Delete expired StockNews in bounded batches"""
+    from retention import run_news_retention as retention_job
+    return retention_job()
+
+@celery.task
+def refresh_ticker_reference():
+    """Reload Polygon reference tickers and backfill StockData names"""
+    from ticker_reference import refresh_ticker_reference as reference_job
+    return reference_job()
+
+@celery.task
+def fetch_snapshot_and_save_stock(user_id, symbol):
+    """Fetch a new symbol's snapshot + news off the request path, then add it to the user's list"""
+    from daily_data import get_stock_snapshot
+    from webapp import db
+    from webapp.models import UserSavedStock
+    from webapp.cache import bump_data_version
+    from webapp.jobs import set_snapshot_status
+
+    with app.app_context():
+        if not get_stock_snapshot(symbol):
+            print(f"❌ Snapshot fetch failed for {symbol} (user {user_id})")
+            set_snapshot_status(user_id, symbol, "failed")
+            return "failed"
+
+        bump_data_version()  # The snapshot stored news, so /api/news ETags must change
+
+        saved = UserSavedStock.query.filter_by(user_id=user_id).all()
+        if any(row.stock_symbol == symbol for row in saved):
+            set_snapshot_status(user_id, symbol, "ready")
+            return "ready"
+        if len(saved) >= Config.MAX_SAVED_STOCKS:
+            print(f"⚠️ User {user_id} hit the saved stock limit before {symbol} was ready")
+            set_snapshot_status(user_id, symbol, "failed")
+            return "failed"
+
+        db.session.add(UserSavedStock(user_id=user_id, stock_symbol=symbol, date_added=datetime.datetime.now(datetime.timezone.utc)))
+        db.session.commit()
+        set_snapshot_status(user_id, symbol, "ready")
+        print(f"✅ Stock {symbol} saved for user {user_id}")
+        return "ready"
+
 # Schedule the task to run every weekday at 4 PM ET
 celery.conf.update(
     beat_schedule = {
@@ -28,5 +73,13 @@ celery.conf.update(
             'task': 'celery_worker.run_main',
             'schedule': crontab(minute=10, hour=20, day_of_week='mon-fri'),  # Run at 10:10 AM PST/PDT
         },
+        'run-news-retention-hourly': {
+            'task': 'celery_worker.run_news_retention',
+            'schedule': crontab(minute=5),  # Every hour at :05
+        },
+        'refresh-ticker-reference-daily': {
+            'task': 'celery_worker.refresh_ticker_reference',
+            'schedule': crontab(minute=30, hour=3),  # Before the US session
+        },
     }
 )
\ No newline at end of file
@@ -14,4 +14,116 @@ class Config:
     SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
     STRIPE_WEBHOOK_KEY = os.getenv("STRIPE_WEBHOOK_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    POLYGON_API_KEY=os.getenv("POLYGON_API_KEY")
\ No newline at end of file
+    POLYGON_API_KEY=os.getenv("POLYGON_API_KEY")
+    # news_ranking.py reads older StockNews: NEWS_HISTORY_DAYS before the last day for novelty and
+    # NEWS_IDF_DAYS for the IDF table, so retention never keeps less than max(history + 1, IDF) days
+    NEWS_IDF_DAYS = int(os.getenv("NEWS_IDF_DAYS", 7))
+    NEWS_HISTORY_DAYS = int(os.getenv("NEWS_HISTORY_DAYS", 3))
+    NEWS_RETENTION_DAYS = max(int(os.getenv("NEWS_RETENTION_DAYS", 1)), NEWS_HISTORY_DAYS + 1, NEWS_IDF_DAYS)
+    NEWS_RETENTION_BATCH_SIZE = int(os.getenv("NEWS_RETENTION_BATCH_SIZE", 5000))
+    # Database pools per role; the replica is optional and only serves @read_only views
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    REPLICA_POOL_SIZE = int(os.getenv("REPLICA_POOL_SIZE", 10))
+    REPLICA_MAX_OVERFLOW = int(os.getenv("REPLICA_MAX_OVERFLOW", 20))
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 30))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", 10))
+    DASHBOARD_NEWS_LIMIT = int(os.getenv("DASHBOARD_NEWS_LIMIT", 50))
+    # Redis backs the Celery broker and the versioned fragment cache for the dashboard
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", 86400))
+    # JSON API pagination (keyset on date_published, id)
+    API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", 20))
+    API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 100))
+    # Server-Sent Events (/live/stream)
+    LIVE_HEARTBEAT_SECONDS = int(os.getenv("LIVE_HEARTBEAT_SECONDS", 15))
+    LIVE_STREAM_MAX_SECONDS = int(os.getenv("LIVE_STREAM_MAX_SECONDS", 600))
+    LIVE_CLIENT_QUEUE_SIZE = int(os.getenv("LIVE_CLIENT_QUEUE_SIZE", 100))
+    # Open streams per web process; keep it well under GUNICORN_THREADS so pages, the API and the
+    # Stripe webhook always have threads left. Past the cap dashboards poll /api/watchlist instead.
+    LIVE_MAX_STREAMS = int(os.getenv("LIVE_MAX_STREAMS", 8))
+    LIVE_POLL_SECONDS = int(os.getenv("LIVE_POLL_SECONDS", 60))
+    MAX_SAVED_STOCKS = int(os.getenv("MAX_SAVED_STOCKS", 5))
+    # Watchlist sparkline and trend windows, in trading days of stock_daily_history
+    WATCHLIST_SPARKLINE_DAYS = int(os.getenv("WATCHLIST_SPARKLINE_DAYS", 20))
+    WATCHLIST_TREND_DAYS = int(os.getenv("WATCHLIST_TREND_DAYS", 5))
+    TICKER_INDEX_TTL = int(os.getenv("TICKER_INDEX_TTL", 900))
+    # The daily refresh only drops delisted tickers when the new list has at least this share of the old one
+    TICKER_PRUNE_MIN_RATIO = float(os.getenv("TICKER_PRUNE_MIN_RATIO", 0.9))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))
+    # Request instrumentation: Server-Timing header, /metrics histograms and the slow-query log
+    REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    SQL_STATEMENT_HEADER = os.getenv("SQL_STATEMENT_HEADER", "").lower() in ("1", "true", "yes")
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 250))
+    METRICS_WINDOW_SIZE = int(os.getenv("METRICS_WINDOW_SIZE", 1000))
+    ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    # LLM pipeline: shared limits for concurrent OpenAI calls (see llm.py)
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 8))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 150000))  # TPM for models not in LLM_MODEL_LIMITS
+    LLM_DEFAULT_RPM = int(os.getenv("LLM_DEFAULT_RPM", 500))
+    # Per-model "model=rpm:tpm" limits, enforced across processes by llm_scheduler.py
+    LLM_MODEL_LIMITS = {
+        model.strip(): tuple(int(value) for value in limits.split(":"))
+        for model, limits in (entry.split("=") for entry in os.getenv(
+            "LLM_MODEL_LIMITS", "gpt-4-turbo=500:150000,gpt-4=500:40000,gpt-4o-mini=500:200000,gpt-3.5-turbo=500:200000"
+        ).split(",") if entry.strip())
+    }
+    LLM_BACKGROUND_SHARE = float(os.getenv("LLM_BACKGROUND_SHARE", 0.7))  # of each limit usable by background calls
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 30.0))
+    # LLM call telemetry (llm_telemetry.py, llm_report.py); prices are "model=input:output" USD per 1M tokens
+    LLM_TELEMETRY_ENABLED = os.getenv("LLM_TELEMETRY_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_PRICES = {
+        model.strip(): tuple(float(value) for value in prices.split(":"))
+        for model, prices in (entry.split("=") for entry in os.getenv(
+            "LLM_PRICES", "gpt-4-turbo=10:30,gpt-4=30:60,gpt-4o-mini=0.15:0.6,gpt-3.5-turbo=0.5:1.5"
+        ).split(",") if entry.strip())
+    }
+    SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4-turbo")
+    # Summary routing (summary_router.py): quiet days get a template, normal days the cheaper model
+    SUMMARY_MODEL_NORMAL = os.getenv("SUMMARY_MODEL_NORMAL", "gpt-4o-mini")
+    SUMMARY_MODEL_EVENTFUL = os.getenv("SUMMARY_MODEL_EVENTFUL", SUMMARY_MODEL)
+    SUMMARY_QUIET_CHANGE_PCT = float(os.getenv("SUMMARY_QUIET_CHANGE_PCT", 0.75))
+    SUMMARY_QUIET_RVOL = float(os.getenv("SUMMARY_QUIET_RVOL", 1.2))
+    SUMMARY_EVENTFUL_CHANGE_PCT = float(os.getenv("SUMMARY_EVENTFUL_CHANGE_PCT", 3.0))
+    SUMMARY_EVENTFUL_RVOL = float(os.getenv("SUMMARY_EVENTFUL_RVOL", 2.0))
+    SUMMARY_EVENTFUL_RANKSCORE = float(os.getenv("SUMMARY_EVENTFUL_RANKSCORE", 6.0))
+    SUMMARY_FETCH_WORKERS = int(os.getenv("SUMMARY_FETCH_WORKERS", 8))
+    SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", 600))  # completion tokens per symbol
+    SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 5))  # symbols per request; 1 disables batching
+    # Summary fingerprints: regenerate only when bucketed inputs change or the summary is this old
+    SUMMARY_MAX_AGE_HOURS = int(os.getenv("SUMMARY_MAX_AGE_HOURS", 24))
+    SUMMARY_CHANGE_BUCKET = float(os.getenv("SUMMARY_CHANGE_BUCKET", 1.0))
+    SUMMARY_LEVEL_PROXIMITY_PCT = float(os.getenv("SUMMARY_LEVEL_PROXIMITY_PCT", 2.0))
+    # Token budgets for GPT prompt sections (prompt_builder.py)
+    PROMPT_HEADLINE_TOKENS = int(os.getenv("PROMPT_HEADLINE_TOKENS", 3000))
+    PROMPT_SECTION_TOKENS = int(os.getenv("PROMPT_SECTION_TOKENS", 800))
+    PROMPT_WEEKLY_TOKENS = int(os.getenv("PROMPT_WEEKLY_TOKENS", 4000))
+    PROMPT_STOCK_NEWS_TOKENS = int(os.getenv("PROMPT_STOCK_NEWS_TOKENS", 250))
+    PROMPT_DESCRIPTION_TOKENS = int(os.getenv("PROMPT_DESCRIPTION_TOKENS", 60))
+    PROMPT_DEDUPE_THRESHOLD = float(os.getenv("PROMPT_DEDUPE_THRESHOLD", 0.7))
+    PROMPT_RECENCY_HALF_LIFE_HOURS = float(os.getenv("PROMPT_RECENCY_HALF_LIFE_HOURS", 12))
+    # Daily recap: "map_reduce" digests headline themes in parallel before the final recap; "single" is one prompt
+    DAILY_RECAP_MODE = os.getenv("DAILY_RECAP_MODE", "map_reduce")
+    RECAP_MODEL = os.getenv("RECAP_MODEL", "gpt-4-turbo")
+    RECAP_FALLBACK_MODEL = os.getenv("RECAP_FALLBACK_MODEL", "gpt-3.5-turbo")
+    RECAP_CLUSTER_MODEL = os.getenv("RECAP_CLUSTER_MODEL", "gpt-4o-mini")
+    RECAP_CONCURRENCY = int(os.getenv("RECAP_CONCURRENCY", 4))
+    RECAP_MIN_CLUSTER_SIZE = int(os.getenv("RECAP_MIN_CLUSTER_SIZE", 2))
+    RECAP_CLUSTER_TOKENS = int(os.getenv("RECAP_CLUSTER_TOKENS", 1200))  # headline input per theme
+    RECAP_DIGEST_MAX_TOKENS = int(os.getenv("RECAP_DIGEST_MAX_TOKENS", 300))
+    RECAP_MAX_TOKENS = int(os.getenv("RECAP_MAX_TOKENS", 1500))
+    # Daily market digests (market_digest.py) feeding the weekly report
+    DIGEST_MODEL = os.getenv("DIGEST_MODEL", "gpt-4o-mini")
+    WEEKLY_HEADLINE_LIMIT = int(os.getenv("WEEKLY_HEADLINE_LIMIT", 50))
+    # Local news ranking before summarization (news_ranking.py); NEWS_IDF_DAYS / NEWS_HISTORY_DAYS are
+    # next to NEWS_RETENTION_DAYS, which depends on them
+    NEWS_BM25_K1 = float(os.getenv("NEWS_BM25_K1", 1.2))
+    NEWS_BM25_B = float(os.getenv("NEWS_BM25_B", 0.75))
+    NEWS_RELEVANCE_WEIGHT = float(os.getenv("NEWS_RELEVANCE_WEIGHT", 0.5))
+    NEWS_NOVELTY_WEIGHT = float(os.getenv("NEWS_NOVELTY_WEIGHT", 0.3))
+    NEWS_RANKSCORE_WEIGHT = float(os.getenv("NEWS_RANKSCORE_WEIGHT", 0.2))
+    NEWS_DUPLICATE_SIMILARITY = float(os.getenv("NEWS_DUPLICATE_SIMILARITY", 0.8))
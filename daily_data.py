@@ -1,4 +1,5 @@
 import os
+import json
 from polygon import StocksClient
 from dotenv import load_dotenv
 from webapp import create_app  # Import your Flask app factory
@@ -7,9 +8,24 @@ from flask import current_app
 from webapp.models import StockData  # Ensure you have this model
 import requests
 from polygon_api import get_news_for_ticker
+from markdown import render_summary_html
+from webapp.live import publish_live_event
+from webapp.dashboard import news_to_dict
+from webapp.cache import bump_data_version
+from webapp.tickers import ticker_name
 from datetime import datetime, timezone, timedelta, date
-import openai
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update
+from config import Config
+from llm import complete_many, count_message_tokens, count_tokens, run_async
+from llm_scheduler import PRIORITY_CRITICAL
+from llm_telemetry import record_cache_hit
+from prompt_builder import format_stock_news
+from news_ranking import rank_symbol_news
+from summary_router import QUIET, classify_symbol, templated_summary, tier_models, RoutingStats
+from summary_cache import build_fingerprint, load_cached_summaries, store_summaries, prune_summary_cache, SummaryRunStats
 import statistics
 from dateutil import tz
 import pytz  # at the top of your file if needed
@@ -22,10 +38,8 @@ load_dotenv()
 api_key = os.getenv('STOCKNEWSAPI_KEY')
 MAX_TICKERS_PER_CALL = 20  # ✅ Start with 20 tickers per request (adjustable)
 api_key2 =os.getenv('POLYGON_API_KEY')
-api_key3 =os.getenv('OPENAI_API_KEY')
 
 client = StocksClient(api_key2)
-OpenAIClient = openai.OpenAI(api_key=api_key3)
 
 BASE_URL = "https://api.polygon.io"
 
@@ -148,7 +162,7 @@ def fetch_bollinger_bands(symbol):
     return None, None
 
 def fetch_support_resistance(symbol):
-    """Estimates support and resistance levels using recent highs/lows."""
+    """Estimates (support, resistance) levels using recent lows/highs."""
     try:
         start_date = date.today() - timedelta(days=30)
         url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start_date}/{date.today()}?apiKey={api_key2}"
@@ -161,7 +175,7 @@ def fetch_support_resistance(symbol):
             lows = [day['l'] for day in data['results']]
             resistance = round(max(highs), 2)
             support = round(min(lows), 2)
-            return resistance, support
+            return support, resistance
     except Exception as e:
         print(f"⚠️ Error fetching Support & Resistance: {e}")
 
@@ -172,6 +186,9 @@ def fetch_and_store_top_news(limit=100):
     with app.app_context():
         print("📡 Fetching stock market news...")
 
+        # Remember what's on the dashboards now so only genuinely new headlines are pushed live
+        previous_urls = {row.url for row in db.session.query(StockNews.url).filter(StockNews.rankscore.isnot(None)).all()}
+
          # 🗑️ Delete only trending news (identified by having a rankscore)
         db.session.query(StockNews).filter(StockNews.rankscore.isnot(None)).delete()
         db.session.commit()
@@ -195,6 +212,7 @@ def fetch_and_store_top_news(limit=100):
         print(f"✅ Found {len(stored_symbols)} stocks in StockData.")
 
         added_count = 0  # Track successfully added news articles
+        new_headlines = []
 
         for article in news_data['data']:
             title = article.get('title', '').upper()
@@ -226,11 +244,16 @@ def fetch_and_store_top_news(limit=100):
                 db.session.add(news_item)
                 db.session.commit()  # ✅ Save every article, even if tickers are missing
                 added_count += 1
+                if news_item.url not in previous_urls:
+                    new_headlines.append(news_item)
             except Exception as e:
                 db.session.rollback()  # ✅ Prevent any single error from stopping others
                 print(f"⚠️ Skipping article due to DB error: {e}")
 
         print(f"✅ Stored {added_count} news articles in the database (ignoring tickers).")
+
+        if new_headlines:
+            publish_live_event("headlines", [news_to_dict(news) for news in new_headlines])
         
 def fetch_and_store_bulk_stock_news():
     """Fetches news for multiple tickers in one API call, reducing API usage and only storing top-ranked articles."""
@@ -244,6 +267,7 @@ def fetch_and_store_bulk_stock_news():
 
         tickers_list = list(tickers)  # Convert set to list for slicing
         batch_size = MAX_TICKERS_PER_CALL  # Start with the max batch size
+        total_added = 0
 
         for i in range(0, len(tickers_list), batch_size):
             batch = tickers_list[i:i + batch_size]
@@ -313,9 +337,13 @@ def fetch_and_store_bulk_stock_news():
                         print(f"⚠️ Skipping duplicate news for {ticker}: {title}")
 
             db.session.commit()
+            total_added += added_count
             print(f"✅ Stored {added_count} news articles for batch: {batch}")
 
             time.sleep(2)  # ✅ Avoid hitting API rate limits
+
+        if total_added:
+            bump_data_version()  # New StockNews rows: /api/news ETags must change
  
 def get_top_market_movers(direction='gainers', min_volume=10000):
     """
@@ -462,7 +490,7 @@ def fetch_and_store_breakouts(snapshot=None, limit=10):
                 # Insert new stock
                 stock_entry = StockData(
                     symbol=stock['symbol'],
-                    name="Unknown",  # Optional: You can fetch names elsewhere
+                    name=ticker_name(stock['symbol']) or "Unknown",
                     price=stock['price'],
                     rsi=stock['rsi'],
                     volume=stock['rvol'],
@@ -671,7 +699,7 @@ def get_stock_snapshot(symbol):
             elif price_change < 0:
                 categories.append("loser")
 
-            stock_name = f"{symbol} (No name found)"
+            stock_name = ticker_name(symbol) or f"{symbol} (No name found)"
 
             stock_entry = StockData.query.filter_by(symbol=symbol).first()
 
@@ -763,141 +791,438 @@ def get_stock_snapshot(symbol):
             db.session.rollback()
             return None
 
-def fetch_and_summarize_stock_news():
-    """Fetches news from the database & generates GPT summaries."""
-    print("📡 Fetching & summarizing stock news...")
-
-    fetch_and_store_bulk_stock_news()  # ✅ Pull fresh news before summarizing
-
-    with app.app_context():
-        tracked_stocks = {row.stock_symbol for row in UserSavedStock.query.all()}
-        print(f"✅ Found {len(tracked_stocks)} unique tracked stocks.")
-
-        for symbol in tracked_stocks:
-            print(f"🔄 Fetching fresh snapshot for {symbol}...")
-            if not get_stock_snapshot(symbol):
-                print(f"❌ Failed to fetch snapshot for {symbol}. Skipping.")
-                continue
-
-            stock_entry = StockData.query.filter_by(symbol=symbol).first()
-            if not stock_entry:
-                print(f"❌ {symbol} not found in StockData after snapshot. Skipping.")
-                continue
-
-            now_utc = datetime.now(timezone.utc)
+SUMMARY_SYSTEM_PROMPT = "You are a seasoned financial analyst providing concise yet insightful stock updates for investors. Your analysis should be strategic, forward-looking, and impactful."
+SUMMARY_FRESH_FOR = timedelta(hours=2)
 
-            if stock_entry.summary_text and stock_entry.summary_last_updated:
-                last_updated = stock_entry.summary_last_updated
 
-                if last_updated.tzinfo is None:
-                    # Treat naive timestamp as LOCAL time and convert to UTC
-                    local_tz = pytz.timezone("America/New_York")  # or your actual local timezone
-                    last_updated = local_tz.localize(last_updated).astimezone(pytz.utc)
+def summary_age(stock_entry, now_utc):
+    """How old the stored summary is, or None if there isn't one."""
+    if not (stock_entry.summary_text and stock_entry.summary_last_updated):
+        return None
 
-                now_utc = datetime.now(timezone.utc)
-                time_diff = now_utc - last_updated
+    last_updated = stock_entry.summary_last_updated
+    if last_updated.tzinfo is None:
+        # Treat naive timestamp as LOCAL time and convert to UTC
+        local_tz = pytz.timezone("America/New_York")  # or your actual local timezone
+        last_updated = local_tz.localize(last_updated).astimezone(pytz.utc)
 
-                print(f"🕒 Last updated for {symbol}: {last_updated}")
-                print(f"⏳ Time since last update for {symbol}: {time_diff.total_seconds() / 60:.2f} minutes")
+    return now_utc - last_updated
 
-                if time_diff < timedelta(hours=2):
-                    print(f"⚠️ Skipping {symbol}, summary is already fresh.")
-                    continue
 
-            def safe_call(func, *args):
-                try:
-                    return func(*args)
-                except Exception as e:
-                    print(f"❌ Error in {func.__name__} for {symbol}: {e}")
-                    return None
+def summary_is_fresh(stock_entry, now_utc):
+    """True if the stored summary is younger than SUMMARY_FRESH_FOR."""
+    time_diff = summary_age(stock_entry, now_utc)
+    if time_diff is None:
+        return False
+    print(f"⏳ Time since last update for {stock_entry.symbol}: {time_diff.total_seconds() / 60:.2f} minutes")
+    return time_diff < SUMMARY_FRESH_FOR
 
-            rsi_value = safe_call(fetch_rsi, symbol)
-            ma_result = safe_call(fetch_moving_averages, symbol) or (None, None)
-            macd_result = safe_call(fetch_macd, symbol) or (None, None, None)
-            rvol = safe_call(fetch_relative_volume, symbol)
-            support, resistance = safe_call(fetch_support_resistance, symbol) or (None, None)
 
-            ma_50, ma_200 = ma_result
-            macd_value, signal_line, histogram = macd_result
+def fetch_indicators(symbol):
+    """All Polygon indicator calls for one symbol; any that fail come back as None."""
+    def safe_call(func, *args):
+        try:
+            return func(*args)
+        except Exception as e:
+            print(f"❌ Error in {func.__name__} for {symbol}: {e}")
+            return None
 
-            news_articles = StockNews.query.filter(
-                StockNews.symbol == symbol,
-                StockNews.date_published >= now_utc - timedelta(days=1)
-            ).order_by(StockNews.rankscore.desc()).all()
+    ma_50, ma_200 = safe_call(fetch_moving_averages, symbol) or (None, None)
+    macd_value, signal_line, histogram = safe_call(fetch_macd, symbol) or (None, None, None)
+    support, resistance = safe_call(fetch_support_resistance, symbol) or (None, None)
+    return {
+        "rsi": safe_call(fetch_rsi, symbol),
+        "ma_50": ma_50,
+        "ma_200": ma_200,
+        "macd": macd_value,
+        "signal": signal_line,
+        "histogram": histogram,
+        "rvol": safe_call(fetch_relative_volume, symbol),
+        "support": support,
+        "resistance": resistance,
+    }
+
+
+def gather_symbol_data(symbol, now_utc):
+    """
+    Stage 1 for one symbol, run on a worker thread: fresh snapshot (+ news), freshness check,
+    then indicators. Returns the indicators, "fresh" if the summary is recent, or None on failure.
+    """
+    with app.app_context():
+        print(f"🔄 Fetching fresh snapshot for {symbol}...")
+        if not get_stock_snapshot(symbol):
+            print(f"❌ Failed to fetch snapshot for {symbol}. Skipping.")
+            return None
 
-            recent_news = [f"{news.headline}: {news.description}" for news in news_articles[:3]]
-            combined_text = " ".join(recent_news)
+        stock_entry = StockData.query.filter_by(symbol=symbol).first()
+        if not stock_entry:
+            print(f"❌ {symbol} not found in StockData after snapshot. Skipping.")
+            return None
+        if summary_is_fresh(stock_entry, now_utc):
+            print(f"⚠️ Skipping {symbol}, summary is already fresh.")
+            return "fresh"
 
-            prompt = f"""
-            You are a sharp financial analyst summarizing {symbol}'s market behavior. Write for beginner-to-intermediate investors, with insights smart enough to impress pros.
+    return fetch_indicators(symbol)
 
-            Use the data below to craft a short, actionable summary. Be concise — focus only on what stands out. Skip fluff or repetition:
 
-            - **Price**: ${stock_entry.price:.2f} ({stock_entry.change_percent:.2f}%)
+def load_recent_news(symbols, now_utc, per_symbol=3, names=None):
+    """
+    Top `per_symbol` articles from the last day for each symbol, ranked locally for ticker relevance,
+    novelty against the previous NEWS_HISTORY_DAYS and rankscore, near-duplicates dropped (news_ranking.py).
+    """
+    since = now_utc - timedelta(days=1)
+    candidates = {}
+    for article in StockNews.query.filter(StockNews.symbol.in_(symbols), StockNews.date_published >= since).all():
+        candidates.setdefault(article.symbol, []).append(article)
+    history = {}
+    for article in StockNews.query.filter(
+        StockNews.symbol.in_(list(candidates)),
+        StockNews.date_published >= since - timedelta(days=Config.NEWS_HISTORY_DAYS),
+        StockNews.date_published < since
+    ).all():
+        history.setdefault(article.symbol, []).append(article)
+    return rank_symbol_news(candidates, history, names or {}, now_utc, per_symbol)
+
+
+def build_summary_data_block(stock_entry, indicators, news_articles):
+    """The per-symbol data lines shared by the single and batched summary prompts."""
+    combined_text = format_stock_news(news_articles, ranked=True)
+    rsi_value = indicators["rsi"]
+
+    return f"""- **Price**: ${stock_entry.price:.2f} ({stock_entry.change_percent:.2f}%)
             - **Volume**: {stock_entry.volume:,}
             - **Key News**: {combined_text}
             - **RSI**: {rsi_value} ({'Oversold — rebound potential' if rsi_value and rsi_value < 30 else 'Overbought — possible pullback' if rsi_value and rsi_value > 70 else 'Neutral'})
-            - **50-day MA**: {ma_50}
-            - **200-day MA**: {ma_200}
-            - **MACD**: Line {macd_value}, Signal {signal_line}, Histogram {histogram}
-            - **RVOL**: {rvol}
-            - **Support / Resistance**: Support near ${support}, Resistance near ${resistance}
+            - **50-day MA**: {indicators["ma_50"]}
+            - **200-day MA**: {indicators["ma_200"]}
+            - **MACD**: Line {indicators["macd"]}, Signal {indicators["signal"]}, Histogram {indicators["histogram"]}
+            - **RVOL**: {indicators["rvol"]}
+            - **Support / Resistance**: Support near ${indicators["support"]}, Resistance near ${indicators["resistance"]}"""
 
-            ---
-
-            ### Output Style:
 
+SUMMARY_OUTPUT_STYLE = """
             Write a concise 2-paragraph stock snapshot. Focus only on what stands out — skip fluff and repetition.
 
             - **Trend Check** – Summarize technical momentum (MACD, RSI, MAs, etc.) in 1–2 clear sentences.
             - **News Pulse** – Only mention news if it's materially driving price, sentiment, or volume.
 
             Wrap with a **forward-looking insight** (e.g. key level, setup, or likely next move).
+"""
+
 
+def build_summary_prompt(symbol, data_block):
+    return f"""
+            You are a sharp financial analyst summarizing {symbol}'s market behavior. Write for beginner-to-intermediate investors, with insights smart enough to impress pros.
+
+            Use the data below to craft a short, actionable summary. Be concise — focus only on what stands out. Skip fluff or repetition:
+
+            {data_block}
+
+            ---
+
+            ### Output Style:
+            {SUMMARY_OUTPUT_STYLE}
             If the stock was quiet:
             > "{symbol} showed no meaningful changes today. No actionable signal."
 
             Avoid repeating raw inputs unless they directly support the insight. Aim for clarity, brevity, and signal.
             """
 
-            try:
-                response = OpenAIClient.chat.completions.create(
-                    model="gpt-4-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a seasoned financial analyst providing concise yet insightful stock updates for investors. Your analysis should be strategic, forward-looking, and impactful."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1
-                )
-                summary_text = response.choices[0].message.content.strip()
 
-                stock_entry.summary_text = summary_text
-                stock_entry.summary_last_updated = now_utc
-                db.session.commit()
+def build_batch_summary_prompt(data_blocks):
+    """One prompt for several symbols: the instructions once, then each symbol's data block."""
+    symbols = list(data_blocks)
+    stock_sections = "\n\n".join(f"            #### {symbol}\n            {block}" for symbol, block in data_blocks.items())
+    return f"""
+            You are a sharp financial analyst summarizing the market behavior of several stocks. Write for beginner-to-intermediate investors, with insights smart enough to impress pros.
 
-                print(f"✅ Saved GPT summary for {symbol}.")
+            For EACH stock below, use only that stock's data to craft a short, actionable summary. Be concise — focus only on what stands out. Skip fluff or repetition:
 
-            except Exception as e:
-                print(f"❌ Error summarizing {symbol}: {e}")
-                db.session.rollback()
+{stock_sections}
+
+            ---
 
+            ### Output Style (for each stock):
+            {SUMMARY_OUTPUT_STYLE}
+            If a stock was quiet, its summary is:
+            > "<SYMBOL> showed no meaningful changes today. No actionable signal."
 
+            Avoid repeating raw inputs unless they directly support the insight. Aim for clarity, brevity, and signal.
+
+            ### Response Format:
+            Respond with a JSON object only: {{"summaries": [{{"symbol": "<SYMBOL>", "summary": "<markdown summary>"}}]}}
+            with exactly one entry for each of: {", ".join(symbols)}.
+            """
 
-def delete_old_news(days_old=1):
+
+def parse_batch_summaries(text, symbols):
     """
-    Deletes news articles older than the given number of days (default: 30).
+    Validates a batched response and splits it per symbol. Entries for unexpected symbols, duplicates
+    and empty or trivially short summaries are dropped, so those symbols fall back to single calls.
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=days_old)
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        print(f"⚠️ Batched summary response for {', '.join(symbols)} was not valid JSON.")
+        return {}
+
+    entries = payload.get("summaries") if isinstance(payload, dict) else payload
+    if not isinstance(entries, list):
+        print(f"⚠️ Batched summary response for {', '.join(symbols)} had no summaries list.")
+        return {}
+
+    expected = set(symbols)
+    summaries = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        symbol = str(entry.get("symbol", "")).upper().strip()
+        summary = entry.get("summary")
+        if symbol in expected and symbol not in summaries and isinstance(summary, str) and len(summary.strip()) >= 40:
+            summaries[symbol] = summary.strip()
+    return summaries
+
+
+async def summarize_symbols(data_blocks, model=None):
+    """
+    Summaries for {symbol: data_block} from `model` (SUMMARY_MODEL by default). With SUMMARY_BATCH_SIZE > 1,
+    symbols are packed into batched JSON-mode requests first; any symbol missing or invalid in its
+    batch is retried on its own.
+    """
+    model = model or Config.SUMMARY_MODEL
+
+    def single_messages(symbol):
+        return [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": build_summary_prompt(symbol, data_blocks[symbol])},
+        ]
+
+    symbols = list(data_blocks)
+    batch_size = Config.SUMMARY_BATCH_SIZE
+    summaries = {}
+
+    if batch_size > 1 and len(symbols) > 1:
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        batch_requests = {
+            ",".join(batch): [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": build_batch_summary_prompt({symbol: data_blocks[symbol] for symbol in batch})},
+            ]
+            for batch in batches
+        }
+        responses = await complete_many(batch_requests, model=model,
+                                        max_tokens=Config.SUMMARY_MAX_TOKENS * batch_size,
+                                        response_format={"type": "json_object"},
+                                        priority=PRIORITY_CRITICAL, job="stock_summaries")
+        for key, text in responses.items():
+            summaries.update(parse_batch_summaries(text, key.split(",")))
+        print(f"📦 {len(batches)} batched requests covered {len(summaries)}/{len(symbols)} symbols.")
+
+    missing = [symbol for symbol in symbols if symbol not in summaries]
+    if missing:
+        if len(missing) < len(symbols):
+            print(f"↩️ Falling back to single-symbol calls for {', '.join(missing)}.")
+        summaries.update(await complete_many({symbol: single_messages(symbol) for symbol in missing},
+                                             model=model, max_tokens=Config.SUMMARY_MAX_TOKENS,
+                                             priority=PRIORITY_CRITICAL, job="stock_summaries"))
+    return summaries
+
+
+async def summarize_tiers(data_blocks, tiers, routing):
+    """Summarizes each LLM tier with its own model, the tiers concurrently; records each model's latency."""
+    models = tier_models()
+
+    async def summarize_tier(tier):
+        symbols = [symbol for symbol in data_blocks if tiers[symbol] == tier]
+        if not symbols:
+            return {}
+        started = time.monotonic()
+        summaries = await summarize_symbols({symbol: data_blocks[symbol] for symbol in symbols}, model=models[tier])
+        routing.timed(models[tier], time.monotonic() - started)
+        return summaries
+
+    summaries = {}
+    for tier_summaries in await asyncio.gather(*(summarize_tier(tier) for tier in models)):
+        summaries.update(tier_summaries)
+    return summaries
+
+
+def fetch_and_summarize_stock_news():
+    """
+    Fetches news from the database & generates GPT summaries, in three stages:
+    1. gather snapshots and indicators for every tracked symbol on a thread pool,
+    2. summarize the stale ones concurrently (LLM_CONCURRENCY calls in flight, LLM_TOKENS_PER_MINUTE budget),
+       quiet days from a template and the rest with the model for their tier (summary_router.py),
+    3. write every new summary in one bulk UPDATE.
+    """
+    print("📡 Fetching & summarizing stock news...")
+
+    fetch_and_store_bulk_stock_news()  # ✅ Pull fresh news before summarizing
+
+    with app.app_context():
+        tracked_stocks = sorted({row.stock_symbol for row in UserSavedStock.query.all()})
+        print(f"✅ Found {len(tracked_stocks)} unique tracked stocks.")
+        if not tracked_stocks:
+            return
 
-    old_news = db.session.query(StockNews).filter(StockNews.date_published < cutoff_date).all()
+        now_utc = datetime.now(timezone.utc)
 
-    deleted_count = len(old_news)
+        # Stage 1: market data (network-bound, so threads overlap the Polygon calls)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=Config.SUMMARY_FETCH_WORKERS) as pool:
+            gathered = dict(zip(tracked_stocks, pool.map(lambda symbol: gather_symbol_data(symbol, now_utc), tracked_stocks)))
+        indicators = {symbol: data for symbol, data in gathered.items() if isinstance(data, dict)}
+        print(f"📦 Gathered data for {len(tracked_stocks)} symbols in {time.monotonic() - started:.1f}s; "
+              f"{len(indicators)} have stale summaries.")
+        if not indicators:
+            return
 
-    for article in old_news:
-        db.session.delete(article)
+        stocks = {stock.symbol: stock for stock in StockData.query.filter(StockData.symbol.in_(list(indicators))).all()}
+        news_by_symbol = load_recent_news(list(indicators), now_utc,
+                                          names={symbol: stock.name for symbol, stock in stocks.items()})
+
+        # Stage 2: skip symbols whose material inputs haven't changed, reuse cached summaries,
+        # and summarize the rest concurrently
+        stats = SummaryRunStats()
+        max_age = timedelta(hours=Config.SUMMARY_MAX_AGE_HOURS)
+        data_blocks = {
+            symbol: build_summary_data_block(stocks[symbol], data, news_by_symbol.get(symbol, []))
+            for symbol, data in indicators.items() if symbol in stocks
+        }
+        messages_by_symbol = {
+            symbol: [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": build_summary_prompt(symbol, data_blocks[symbol])},
+            ]
+            for symbol in data_blocks
+        }
+        fingerprints = {
+            symbol: build_fingerprint(symbol, stocks[symbol], indicators[symbol],
+                                      [article.id for article in news_by_symbol.get(symbol, [])])
+            for symbol in messages_by_symbol
+        }
+        cached = load_cached_summaries(fingerprints.values())
+
+        rows = []
+        requests_by_symbol = {}
+        for symbol, messages in messages_by_symbol.items():
+            stock_entry = stocks[symbol]
+            fingerprint = fingerprints[symbol]
+            age = summary_age(stock_entry, now_utc)
+
+            if stock_entry.summary_fingerprint == fingerprint and age is not None and age < max_age:
+                print(f"♻️ {symbol} inputs unchanged since the last summary. Skipping.")
+                stats.skip_unchanged(count_message_tokens(messages) + count_tokens(stock_entry.summary_text))
+                record_cache_hit("stock_summaries", symbol)
+            elif fingerprint in cached:
+                entry = cached[fingerprint]
+                print(f"♻️ Reusing cached summary for {symbol}.")
+                stats.reuse_cached(entry.tokens or count_message_tokens(messages))
+                record_cache_hit("stock_summaries", symbol)
+                rows.append({
+                    "id": stock_entry.id,
+                    "summary_text": entry.summary_text,
+                    "summary_html": entry.summary_html,
+                    "summary_html_no_headings": entry.summary_html_no_headings,
+                    "summary_fingerprint": fingerprint,
+                    "summary_last_updated": entry.created_at.replace(tzinfo=timezone.utc),
+                })
+            else:
+                requests_by_symbol[symbol] = messages
+
+        # Route what's left: quiet days get the template, the rest go to their tier's model
+        routing = RoutingStats()
+        models = tier_models()
+        tiers = {}
+        templated = {}
+        for symbol in list(requests_by_symbol):
+            tier = classify_symbol(stocks[symbol], indicators[symbol], news_by_symbol.get(symbol, []))
+            if tier == QUIET:
+                templated[symbol] = templated_summary(symbol, stocks[symbol], indicators[symbol])
+                del requests_by_symbol[symbol]
+                routing.route(tier)
+            else:
+                tiers[symbol] = tier
+                routing.route(tier, models[tier])
+
+        llm_started = time.monotonic()
+        summaries = run_async(summarize_tiers({symbol: data_blocks[symbol] for symbol in requests_by_symbol}, tiers, routing))
+        llm_seconds = time.monotonic() - llm_started
+        stats.generated = len(requests_by_symbol)
+
+        # Stage 3: one bulk write for StockData and the summary cache
+        cache_rows = []
+        for symbol, summary_text in summaries.items():
+            summary_html, summary_html_no_headings = render_summary_html(summary_text)
+            rows.append({
+                "id": stocks[symbol].id,
+                "summary_text": summary_text,
+                "summary_html": summary_html,
+                "summary_html_no_headings": summary_html_no_headings,
+                "summary_fingerprint": fingerprints[symbol],
+                "summary_last_updated": now_utc,
+            })
+            cache_rows.append({
+                "fingerprint": fingerprints[symbol],
+                "symbol": symbol,
+                "summary_text": summary_text,
+                "summary_html": summary_html,
+                "summary_html_no_headings": summary_html_no_headings,
+                "tokens": count_message_tokens(requests_by_symbol[symbol]) + count_tokens(summary_text),
+            })
+        for symbol, summary_text in templated.items():
+            summary_html, summary_html_no_headings = render_summary_html(summary_text)
+            rows.append({
+                "id": stocks[symbol].id,
+                "summary_text": summary_text,
+                "summary_html": summary_html,
+                "summary_html_no_headings": summary_html_no_headings,
+                "summary_fingerprint": fingerprints[symbol],
+                "summary_last_updated": now_utc,
+            })
+        if rows:
+            db.session.execute(update(StockData), rows)
+            store_summaries(cache_rows)
+            db.session.commit()
 
-    db.session.commit()
-    print(f"🧹 Deleted {deleted_count} news articles older than {days_old} days.")
+        print(f"✅ Saved {len(rows)} summaries ({len(summaries)} new, {len(templated)} templated, "
+              f"{len(requests_by_symbol) - len(summaries)} failed) in {time.monotonic() - started:.1f}s total.")
+        stats.report()
+        routing.report(llm_seconds)
+        prune_summary_cache()
+
+
+
+def delete_old_news(days_old=1, batch_size=5000):
+    """
+    Deletes news articles older than the given number of days in bounded batches.
+    Each batch is one set-based DELETE on an indexed id range, committed on its own
+    so row locks are held briefly. Returns rows removed and seconds taken.
+    """
+    cutoff_date = datetime.utcnow() - timedelta(days=days_old)
+    started = time.monotonic()
+
+    deleted_count = 0
+    batches = 0
+    while True:
+        expired_ids = db.session.query(StockNews.id)\
+            .filter(StockNews.date_published < cutoff_date)\
+            .limit(batch_size)\
+            .scalar_subquery()
+
+        deleted = db.session.query(StockNews)\
+            .filter(StockNews.id.in_(expired_ids))\
+            .delete(synchronize_session=False)
+        db.session.commit()
+
+        deleted_count += deleted
+        batches += 1
+        if deleted < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    print(f"🧹 Deleted {deleted_count} news articles older than {days_old} days in {batches} batches ({elapsed:.2f}s).")
+    return {"deleted": deleted_count, "batches": batches, "seconds": round(elapsed, 3)}
 
 def update_user_saved_stocks():
     """
@@ -912,6 +1237,13 @@ def update_user_saved_stocks():
             print(f"📥 Updating snapshot for {symbol}")
             get_stock_snapshot(symbol)  # Already handles DB updates + news
 
+        # 📣 Push fresh quotes to open dashboards (each stream filters to its own watchlist)
+        if symbols:
+            publish_live_event("prices", {
+                stock.symbol: {"price": stock.price, "change_percent": stock.change_percent, "volume": stock.volume}
+                for stock in StockData.query.filter(StockData.symbol.in_(list(symbols))).all()
+            })
+
 
 if __name__ == "__main__":
     update_user_saved_stocks()
@@ -7,7 +7,6 @@ from daily_data import (
     fetch_market_snapshot,
     update_user_saved_stocks,
     find_market_breakouts,
-    delete_old_news,
 )
 
 def is_eastern_between(start_hour, end_hour):
@@ -21,6 +20,7 @@ def is_weekday():
     return now_eastern.weekday() < 5  # Mon–Fri
 
 from webapp import create_app  # Import your Flask app factory
+from webapp.dashboard import refresh_dashboard_sections
 
 
 app = create_app()  # Ensure this matches your Flask factory method
@@ -28,7 +28,6 @@ app = create_app()  # Ensure this matches your Flask factory method
 if __name__ == "__main__":
     with app.app_context():
         if is_eastern_between(5, 23):  # 23 = 11PM
-            delete_old_news(days_old=1)
             fetch_and_store_top_news()
         else:
             print("🕒 Outside news update window. Skipping news tasks.")
@@ -41,4 +40,7 @@ if __name__ == "__main__":
             top_traded = fetch_and_store_top_traded(snapshot=snapshot)
             # breakouts = find_market_breakouts(snapshot=snapshot)
         else:
-            print("📉 Outside stock task hours. Skipping stock-related tasks.")
\ No newline at end of file
+            print("📉 Outside stock task hours. Skipping stock-related tasks.")
+
+        # 🧊 Rebuild the shared dashboard sections from whatever changed above
+        refresh_dashboard_sections()
\ No newline at end of file
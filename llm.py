@@ -0,0 +1,146 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import openai
+import tiktoken
+from config import Config
+from llm_telemetry import record_call
+from llm_scheduler import (LLMScheduler, PRIORITY_BACKGROUND, RETRYABLE_ERRORS, backoff_delay,
+                           retry_after_seconds)
+
+_encoding = None
+_encoding_failed = False
+
+
+def count_tokens(text):
+    """
+    Token count with the cl100k_base encoding used by the GPT-4/3.5 family. If the encoding can't be
+    loaded (tiktoken fetches it on first use), falls back to ~4 characters per token.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            _encoding_failed = True
+            print(f"⚠️ Could not load the cl100k_base encoding, estimating tokens from length: {e}")
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text))
+
+
+def truncate_tokens(text, max_tokens):
+    """`text` cut to at most `max_tokens` tokens (on a token boundary), with an ellipsis if anything was cut."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is None:
+        return text[:max_tokens * 4].rstrip() + "…"
+    return _encoding.decode(_encoding.encode(text)[:max_tokens]).rstrip() + "…"
+
+
+def count_message_tokens(messages):
+    # ~4 tokens of framing per message on top of the content
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 2
+
+
+def _quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def complete_many(requests, model, concurrency=None, max_tokens=600, temperature=0.1, response_format=None,
+                        priority=PRIORITY_BACKGROUND, job=None):
+    """
+    Runs chat completions concurrently, at most `concurrency` in flight, admitted by the shared
+    scheduler (llm_scheduler.py) under `model`'s RPM/TPM limits at `priority`. Rate limits, timeouts
+    and server errors are retried up to LLM_MAX_RETRIES times with jittered backoff.
+    `requests` is {key: messages}; returns {key: text}, leaving out keys whose call failed.
+    Pass response_format={"type": "json_object"} for JSON mode.
+    """
+    if not requests:
+        return {}
+    concurrency = concurrency or Config.LLM_CONCURRENCY
+    job = job or model
+    scheduler = LLMScheduler()
+    semaphore = asyncio.Semaphore(concurrency)
+    client = openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY, max_retries=0)
+    queue_waits = []
+    retries = 0
+
+    async def complete(key, messages):
+        nonlocal retries
+        estimated = count_message_tokens(messages) + max_tokens
+        waited = 0.0
+        in_api = 0.0
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            queued = time.monotonic()
+            async with semaphore:
+                reservation = await scheduler.acquire(model, estimated, priority)
+                waited += time.monotonic() - queued
+                sent = time.monotonic()
+                try:
+                    response = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **({"response_format": response_format} if response_format else {}),
+                    )
+                except RETRYABLE_ERRORS as e:
+                    in_api += time.monotonic() - sent
+                    await scheduler.settle(reservation, 0)
+                    if attempt == Config.LLM_MAX_RETRIES:
+                        print(f"❌ {model} call failed for {key} after {attempt + 1} attempts: {e}")
+                        break
+                    error = e
+                except openai.OpenAIError as e:
+                    in_api += time.monotonic() - sent
+                    await scheduler.settle(reservation, 0)
+                    print(f"❌ {model} call failed for {key}: {e}")
+                    break
+                else:
+                    in_api += time.monotonic() - sent
+                    usage = response.usage
+                    if usage:
+                        await scheduler.settle(reservation, usage.total_tokens)
+                    record_call(job, key, model, usage.prompt_tokens if usage else 0,
+                                usage.completion_tokens if usage else 0, in_api * 1000, waited * 1000, attempt)
+                    queue_waits.append(waited)
+                    return key, response.choices[0].message.content.strip()
+            # Back off outside the semaphore so other calls can use the slot
+            retries += 1
+            delay = backoff_delay(attempt, retry_after_seconds(error))
+            print(f"🔁 {model} {type(error).__name__} for {key}, retrying in {delay:.1f}s.")
+            await asyncio.sleep(delay)
+
+        record_call(job, key, model, latency_ms=in_api * 1000, queue_wait_ms=waited * 1000, retries=attempt,
+                    succeeded=False)
+        queue_waits.append(waited)
+        return key, None
+
+    started = time.monotonic()
+    try:
+        results = await asyncio.gather(*(complete(key, messages) for key, messages in requests.items()))
+    finally:
+        await client.close()
+
+    completed = {key: text for key, text in results if text}
+    print(f"🤖 {job}: {len(completed)}/{len(requests)} {model} completions in {time.monotonic() - started:.1f}s "
+          f"(concurrency={concurrency}, {priority}; queue wait p50 {_quantile(queue_waits, 0.5):.1f}s, "
+          f"p95 {_quantile(queue_waits, 0.95):.1f}s, max {max(queue_waits, default=0.0):.1f}s; {retries} retries).")
+    return completed
+
+
+def complete(messages, model, **kwargs):
+    """One chat completion from synchronous code, through the same scheduler; the text, or None if it failed."""
+    return run_async(complete_many({"completion": messages}, model, **kwargs)).get("completion")
+
+
+def run_async(coro):
+    """Runs a coroutine from synchronous pipeline code, including code already called from inside an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
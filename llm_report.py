@@ -0,0 +1,121 @@
+"""
+LLM cost and latency report from the llm_call / llm_run telemetry tables.
+
+    python llm_report.py --days 7 --top 10
+    python llm_report.py --run <run_id>
+
+Prints recent runs (tokens and cost per run and per newsletter email), cost and cache hit rate per
+stage, p50/p95 latency and queue wait per model, and the symbols whose summaries cost the most
+(a batched call's cost is split evenly across its symbols).
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta
+from daily_data import app
+from webapp.models import LLMCall, LLMRun
+
+SYMBOL_STAGE = "stock_summaries"
+
+
+def _quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def print_runs(runs):
+    print("\n📅 Runs")
+    print(f"{'run':<34}{'name':<8}{'started (UTC)':<18}{'calls':>7}{'hits':>6}{'fail':>6}{'retry':>7}"
+          f"{'tokens':>11}{'cost $':>10}{'tok/email':>11}")
+    for run in runs:
+        tokens = run.prompt_tokens + run.completion_tokens
+        per_email = f"{tokens // run.newsletters:,}" if run.newsletters else "-"
+        print(f"{run.run_id:<34}{run.name:<8}{run.started_at:%Y-%m-%d %H:%M}  {run.calls:>7}{run.cache_hits:>6}"
+              f"{run.failed_calls:>6}{run.retries:>7}{tokens:>11,}{run.cost_usd:>10.4f}{per_email:>11}")
+
+
+def print_stages(calls):
+    stages = defaultdict(lambda: {"calls": 0, "hits": 0, "tokens": 0, "cost": 0.0})
+    for call in calls:
+        stage = stages[call.stage]
+        if call.cache_hit:
+            stage["hits"] += 1
+            continue
+        stage["calls"] += 1
+        stage["tokens"] += call.prompt_tokens + call.completion_tokens
+        stage["cost"] += call.cost_usd
+
+    print("\n🧱 Stages")
+    print(f"{'stage':<22}{'calls':>7}{'cache hit %':>13}{'tokens':>11}{'cost $':>10}")
+    for name, stage in sorted(stages.items(), key=lambda item: -item[1]["cost"]):
+        lookups = stage["calls"] + stage["hits"]
+        print(f"{name:<22}{stage['calls']:>7}{100 * stage['hits'] / lookups:>12.0f}%{stage['tokens']:>11,}"
+              f"{stage['cost']:>10.4f}")
+
+
+def print_models(calls):
+    latency = defaultdict(list)
+    waits = defaultdict(list)
+    failures = defaultdict(int)
+    for call in calls:
+        if call.cache_hit or call.model is None:
+            continue
+        if call.latency_ms is not None:
+            latency[call.model].append(call.latency_ms)
+        if call.queue_wait_ms is not None:
+            waits[call.model].append(call.queue_wait_ms)
+        failures[call.model] += 0 if call.succeeded else 1
+
+    print("\n🤖 Models")
+    print(f"{'model':<18}{'calls':>7}{'failed':>8}{'p50 ms':>9}{'p95 ms':>9}{'wait p50':>10}{'wait p95':>10}")
+    for model, values in sorted(latency.items()):
+        print(f"{model:<18}{len(values):>7}{failures[model]:>8}{_quantile(values, 0.5):>9.0f}"
+              f"{_quantile(values, 0.95):>9.0f}{_quantile(waits[model], 0.5):>10.0f}{_quantile(waits[model], 0.95):>10.0f}")
+
+
+def print_symbols(calls, top):
+    cost = defaultdict(float)
+    tokens = defaultdict(float)
+    for call in calls:
+        if call.stage != SYMBOL_STAGE or call.cache_hit or not call.request_key:
+            continue
+        symbols = call.request_key.split(",")
+        for symbol in symbols:
+            cost[symbol] += call.cost_usd / len(symbols)
+            tokens[symbol] += (call.prompt_tokens + call.completion_tokens) / len(symbols)
+
+    print(f"\n💸 Top {top} symbols by summary cost")
+    print(f"{'symbol':<10}{'tokens':>10}{'cost $':>10}")
+    for symbol, value in sorted(cost.items(), key=lambda item: -item[1])[:top]:
+        print(f"{symbol:<10}{tokens[symbol]:>10,.0f}{value:>10.4f}")
+
+
+def report(days=7, top=10, run_id=None):
+    with app.app_context():
+        if run_id:
+            runs = LLMRun.query.filter_by(run_id=run_id).all()
+            calls = LLMCall.query.filter_by(run_id=run_id).all()
+        else:
+            since = datetime.utcnow() - timedelta(days=days)
+            runs = LLMRun.query.filter(LLMRun.started_at >= since).order_by(LLMRun.started_at.desc()).all()
+            calls = LLMCall.query.filter(LLMCall.created_at >= since).all()
+
+        if not calls:
+            print("No LLM calls recorded for that period.")
+            return
+        print_runs(runs)
+        print_stages(calls)
+        print_models(calls)
+        print_symbols(calls, top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM cost and latency report from the pipeline's call telemetry.")
+    parser.add_argument("--days", type=int, default=7, help="report on calls from the last N days")
+    parser.add_argument("--top", type=int, default=10, help="number of symbols to list")
+    parser.add_argument("--run", dest="run_id", help="report on a single run instead")
+    args = parser.parse_args()
+    report(days=args.days, top=args.top, run_id=args.run_id)
+
+
+if __name__ == "__main__":
+    main()
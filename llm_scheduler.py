@@ -0,0 +1,225 @@
+import asyncio
+import random
+import threading
+import time
+import uuid
+import openai
+import redis
+from config import Config
+from webapp.cache import get_redis, _mark_down
+
+# Newsletter-critical calls (the daily recap and stock summaries) go first; background calls
+# (digests, the weekly report, refreshes) only use LLM_BACKGROUND_SHARE of a model's limits and
+# hold off entirely while a critical call is waiting for the same model.
+PRIORITY_CRITICAL = "critical"
+PRIORITY_BACKGROUND = "background"
+
+WINDOW_MS = 60_000
+MAX_POLL_SECONDS = 5.0
+WAITER_TTL_MS = 15_000  # Well over MAX_POLL_SECONDS plus jitter, so a live waiter's entry never lapses
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
+
+# Sliding 60s window per model, shared by every process: a sorted set of reservations (scored by
+# Redis server time) and a hash of their token estimates. Returns 0 when the reservation was taken,
+# otherwise the milliseconds to wait before trying again.
+# Critical calls that have to wait register in a third sorted set, scored by when their entry
+# lapses (WAITER_TTL_MS after their latest attempt), and leave it once admitted. Background calls
+# yield while it holds any live entry, so a waiter that died only holds them up for WAITER_TTL_MS.
+_ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if #expired > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+    redis.call('HDEL', KEYS[2], unpack(expired))
+end
+
+local rpm = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+local tokens = tonumber(ARGV[4])
+if ARGV[6] == 'background' then
+    redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+    if redis.call('ZCARD', KEYS[3]) > 0 then
+        return 250
+    end
+    rpm = math.max(1, math.floor(rpm * tonumber(ARGV[7])))
+    tpm = math.max(1, math.floor(tpm * tonumber(ARGV[7])))
+end
+
+local count = redis.call('ZCARD', KEYS[1])
+local spent = 0
+for _, value in ipairs(redis.call('HVALS', KEYS[2])) do
+    spent = spent + tonumber(value)
+end
+if count == 0 or (count + 1 <= rpm and spent + tokens <= tpm) then
+    redis.call('ZADD', KEYS[1], now, ARGV[5])
+    redis.call('HSET', KEYS[2], ARGV[5], tokens)
+    redis.call('PEXPIRE', KEYS[1], window)
+    redis.call('PEXPIRE', KEYS[2], window)
+    redis.call('ZREM', KEYS[3], ARGV[5])
+    return 0
+end
+if ARGV[6] == 'critical' then
+    local waiter_ttl = tonumber(ARGV[8])
+    redis.call('ZADD', KEYS[3], now + waiter_ttl, ARGV[5])
+    redis.call('PEXPIRE', KEYS[3], waiter_ttl)
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return math.max(50, tonumber(oldest[2]) + window - now)
+"""
+
+# Replaces a reservation's estimate with the tokens actually used, if it's still in the window
+_SETTLE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+return 0
+"""
+
+
+def model_limits(model):
+    """(requests, tokens) per minute for `model` from LLM_MODEL_LIMITS, else the LLM_DEFAULT_* limits."""
+    return Config.LLM_MODEL_LIMITS.get(model, (Config.LLM_DEFAULT_RPM, Config.LLM_TOKENS_PER_MINUTE))
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(Config.LLM_BACKOFF_MAX, Config.LLM_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+def retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class LocalBudget:
+    """
+    Per-model RPM/TPM limiter for one process, used while Redis is unavailable: a request waits until
+    the requests and tokens of the last 60 seconds plus its own fit under the limits (background
+    calls get LLM_BACKGROUND_SHARE of them). A request larger than the whole token budget is let
+    through on an empty window rather than blocking forever. Shared by every event loop in the
+    process (complete_many() calls on different threads), hence the threading lock.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._spent = []  # [monotonic time, tokens] reservations
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens, priority):
+        """A reservation, or the seconds to wait before trying again."""
+        share = Config.LLM_BACKGROUND_SHARE if priority == PRIORITY_BACKGROUND else 1.0
+        rpm = max(1, int(self.requests_per_minute * share))
+        tpm = max(1, int(self.tokens_per_minute * share))
+        with self._lock:
+            now = time.monotonic()
+            self._spent = [entry for entry in self._spent if now - entry[0] < 60]
+            if not self._spent or (len(self._spent) + 1 <= rpm
+                                   and sum(entry[1] for entry in self._spent) + tokens <= tpm):
+                reservation = [now, tokens]
+                self._spent.append(reservation)
+                return reservation, 0.0
+            return None, 60 - (now - self._spent[0][0])
+
+    async def acquire(self, tokens, priority=PRIORITY_BACKGROUND):
+        while True:
+            reservation, wait = self._try_acquire(tokens, priority)
+            if reservation is not None:
+                return reservation
+            await asyncio.sleep(min(MAX_POLL_SECONDS, wait) * random.uniform(0.8, 1.2))
+
+    def settle(self, reservation, actual):
+        with self._lock:
+            reservation[1] = actual
+
+
+_local_budgets = {}
+_local_budgets_lock = threading.Lock()
+
+
+def local_budget(model):
+    """The process-wide fallback budget for `model`."""
+    with _local_budgets_lock:
+        if model not in _local_budgets:
+            _local_budgets[model] = LocalBudget(*model_limits(model))
+        return _local_budgets[model]
+
+
+class Reservation:
+    def __init__(self, model, member=None, local=None):
+        self.model = model
+        self.member = member
+        self.local = local
+
+
+class LLMScheduler:
+    """
+    Admits chat completions under per-model RPM/TPM limits shared by every process (web, Celery worker,
+    pipeline scripts) through Redis. Falls back to a per-process RPM/TPM budget (local_budget())
+    while Redis is down. One scheduler serves one event loop, i.e. one complete_many() call.
+    Redis calls run on a worker thread (asyncio.to_thread) so a slow Redis never stalls the loop
+    that every concurrent completion shares.
+    """
+
+    @staticmethod
+    def _keys(model):
+        return f"llm:window:{model}", f"llm:tokens:{model}", f"llm:critical_waiters:{model}"
+
+    async def acquire(self, model, tokens, priority=PRIORITY_BACKGROUND):
+        rpm, tpm = model_limits(model)
+        member = uuid.uuid4().hex
+        window_key, tokens_key, waiting_key = self._keys(model)
+        admitted = False
+        try:
+            while True:
+                client = get_redis()
+                if client is None:
+                    break
+                try:
+                    wait_ms = await asyncio.to_thread(
+                        client.eval, _ACQUIRE_SCRIPT, 3, window_key, tokens_key, waiting_key, WINDOW_MS, rpm, tpm,
+                        tokens, member, priority, Config.LLM_BACKGROUND_SHARE, WAITER_TTL_MS)
+                    if not wait_ms:
+                        admitted = True
+                        return Reservation(model, member=member)
+                except redis.RedisError as e:
+                    _mark_down(e)
+                    break
+                await asyncio.sleep(min(MAX_POLL_SECONDS, wait_ms / 1000) * random.uniform(0.8, 1.2))
+        finally:
+            if priority == PRIORITY_CRITICAL and not admitted:
+                await self._leave_waiting(waiting_key, member)
+
+        return Reservation(model, local=await local_budget(model).acquire(tokens, priority))
+
+    @staticmethod
+    async def _leave_waiting(waiting_key, member):
+        """Drops a critical waiter that gave up (Redis down, cancelled); the script removes admitted ones."""
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await asyncio.to_thread(client.zrem, waiting_key, member)
+        except redis.RedisError as e:
+            _mark_down(e)
+
+    async def settle(self, reservation, actual):
+        """Replaces a reservation's estimate with the usage the API reported (0 for a rejected call)."""
+        if reservation.local is not None:
+            local_budget(reservation.model).settle(reservation.local, actual)
+            return
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await asyncio.to_thread(client.eval, _SETTLE_SCRIPT, 1, self._keys(reservation.model)[1],
+                                    reservation.member, actual)
+        except redis.RedisError as e:
+            _mark_down(e)
@@ -0,0 +1,108 @@
+import threading
+import uuid
+from datetime import datetime
+from sqlalchemy import func, insert
+from config import Config
+from webapp import db
+from webapp.models import LLMCall, LLMRun
+
+MAX_KEY_LENGTH = 255
+
+# Calls are buffered in memory because llm.complete_many often runs on a worker thread without an
+# app context; the pipeline writes them with flush() / finish_run() once it's back in one.
+_lock = threading.Lock()
+_pending = []
+_run = None
+
+
+def start_run(name):
+    """Tags every LLM call this process makes from now on with a new run id."""
+    global _run
+    _run = {"run_id": uuid.uuid4().hex, "name": name, "started_at": datetime.utcnow()}
+    print(f"🏷️ LLM telemetry run {_run['run_id']} ({name}) started.")
+    return _run["run_id"]
+
+
+def call_cost(model, prompt_tokens, completion_tokens):
+    """USD cost from LLM_PRICES (per million input/output tokens); 0 for unpriced models."""
+    input_price, output_price = Config.LLM_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def record_call(stage, request_key, model, prompt_tokens=0, completion_tokens=0, latency_ms=None,
+                queue_wait_ms=None, retries=0, succeeded=True, cache_hit=False):
+    if not Config.LLM_TELEMETRY_ENABLED:
+        return
+    row = {
+        "run_id": _run["run_id"] if _run else None,
+        "stage": stage,
+        "request_key": str(request_key)[:MAX_KEY_LENGTH] if request_key is not None else None,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": call_cost(model, prompt_tokens, completion_tokens),
+        "latency_ms": latency_ms,
+        "queue_wait_ms": queue_wait_ms,
+        "retries": retries,
+        "cache_hit": cache_hit,
+        "succeeded": succeeded,
+        "created_at": datetime.utcnow(),
+    }
+    with _lock:
+        _pending.append(row)
+
+
+def record_cache_hit(stage, request_key):
+    """A result served without an LLM call (e.g. a reused stock summary)."""
+    record_call(stage, request_key, None, cache_hit=True)
+
+
+def flush():
+    """Writes buffered calls in one bulk INSERT and commits. Needs an app context."""
+    with _lock:
+        rows = list(_pending)
+        _pending.clear()
+    if rows:
+        db.session.execute(insert(LLMCall), rows)
+        db.session.commit()
+    return len(rows)
+
+
+def finish_run(newsletters=None):
+    """Flushes the run's calls and stores its rollup in llm_run. Needs an app context."""
+    global _run
+    flush()
+    if _run is None:
+        return None
+
+    totals = db.session.query(
+        func.count(LLMCall.id),
+        func.coalesce(func.sum(LLMCall.prompt_tokens), 0),
+        func.coalesce(func.sum(LLMCall.completion_tokens), 0),
+        func.coalesce(func.sum(LLMCall.cost_usd), 0.0),
+        func.coalesce(func.sum(LLMCall.retries), 0),
+        func.count(LLMCall.id).filter(LLMCall.cache_hit.is_(True)),
+        func.count(LLMCall.id).filter(LLMCall.succeeded.is_(False)),
+    ).filter(LLMCall.run_id == _run["run_id"]).one()
+    calls, prompt_tokens, completion_tokens, cost, retries, cache_hits, failed = totals
+
+    run = LLMRun(
+        run_id=_run["run_id"],
+        name=_run["name"],
+        started_at=_run["started_at"],
+        finished_at=datetime.utcnow(),
+        calls=calls - cache_hits,
+        failed_calls=failed,
+        cache_hits=cache_hits,
+        retries=retries,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cost_usd=cost,
+        newsletters=newsletters,
+    )
+    db.session.merge(run)
+    db.session.commit()
+    print(f"💵 LLM run {run.name}: {run.calls} calls ({failed} failed, {retries} retries), {cache_hits} cache hits, "
+          f"{prompt_tokens + completion_tokens:,} tokens, ${cost:.4f}.")
+    _run = None
+    return run
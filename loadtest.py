@@ -0,0 +1,351 @@
+"""
+Route-level load test for the web app, fully offline.
+
+    python loadtest.py seed  --db /tmp/loadtest.db --users 200 --news 50000
+    python loadtest.py run   --db /tmp/loadtest.db --concurrency 20 --duration 30
+    python loadtest.py sweep --news-steps 1000,10000,100000 --concurrency 20 --duration 20
+
+`seed` builds a local SQLite database with synthetic users, watchlists, news and strategy rows.
+`run` starts gunicorn against it, drives /home, /save_stock, /landing_snapshot/<symbol> and /login
+from concurrent logged-in clients, and reports latency percentiles, throughput and SQL statements
+per route (from the X-SQL-Statements header). `sweep` reseeds and reruns at each news volume to show
+how routes degrade as StockNews grows.
+"""
+import argparse
+import os
+import random
+import re
+import signal
+import socket
+import statistics
+import string
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import requests
+
+LOADTEST_PASSWORD = "loadtest-password"
+DEFAULT_MIX = "home=6,landing_snapshot=2,save_stock=1,login=1"
+CSRF_TOKEN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+def _loadtest_env(db_path):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.abspath(db_path)}",
+        "SECRET_KEY": env.get("SECRET_KEY", "loadtest-secret"),
+        "SQL_STATEMENT_HEADER": "1",
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY", "loadtest"),
+        # Nothing listens here, so cache/broker calls fail fast and the app takes its no-Redis paths
+        "REDIS_URL": env.get("LOADTEST_REDIS_URL", "redis://127.0.0.1:1/0"),
+    })
+    return env
+
+
+def _symbols(count):
+    rng = random.Random(7)
+    symbols = set()
+    while len(symbols) < count:
+        symbols.add("".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 4))))
+    return sorted(symbols)
+
+
+def seed(db_path, users=200, watchlist=5, news=50_000, strategy=60, symbols=400):
+    """Creates a fresh SQLite database with synthetic data at the given volumes."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ.update(_loadtest_env(db_path))
+
+    from sqlalchemy import insert
+    from webapp import create_app, db, bcrypt
+    from webapp.models import User, StockData, StockNews, UserSavedStock
+    from webapp.dashboard import refresh_dashboard_sections
+
+    app = create_app()
+    rng = random.Random(42)
+    universe = _symbols(symbols)
+    now = datetime.utcnow()
+    started = time.monotonic()
+
+    with app.app_context():
+        db.create_all()
+
+        password_hash = bcrypt.generate_password_hash(LOADTEST_PASSWORD).decode("utf-8")
+        db.session.execute(insert(User), [
+            {"email": f"user{i}@loadtest.example.com", "password": password_hash, "subscription_status": "active"}
+            for i in range(users)
+        ])
+
+        categories = ["gainer", "loser", "top_traded", "market", "neutral"]
+        stock_rows = []
+        for i, symbol in enumerate(universe):
+            is_strategy = i < strategy
+            stock_rows.append({
+                "symbol": symbol,
+                "name": f"{symbol} Corp",
+                "price": round(rng.uniform(5, 500), 2),
+                "change_percent": round(rng.uniform(-8, 8), 2),
+                "change_amount": round(rng.uniform(-5, 5), 2),
+                "volume": rng.randint(100_000, 50_000_000),
+                "category": "strategy" if is_strategy else rng.choice(categories),
+                "strategy_tags": "breakout,momentum" if is_strategy else None,
+                "strategy_score": rng.randint(1, 5) if is_strategy else None,
+                "strategy_label": rng.choice(["Breakout Momentum", "Pullback Reversal", "Fade"]) if is_strategy else None,
+                "days_in_a_row": rng.randint(1, 5),
+                "confidence_score": round(rng.uniform(0, 30), 1),
+                "sentiment": rng.choice(["bullish", "bearish", "neutral"]),
+                "summary_text": f"### Trend Check\n**{symbol}** is trading in a range.\nNo actionable signal.",
+                "last_updated": now,
+            })
+        db.session.execute(insert(StockData), stock_rows)
+
+        for start in range(0, news, 5000):
+            db.session.execute(insert(StockNews), [
+                {
+                    "symbol": rng.choice(universe) if n % 4 else None,
+                    "headline": f"Synthetic headline {n}",
+                    "description": "Synthetic description for load testing.",
+                    "source": "LoadTest Wire",
+                    "rankscore": round(rng.uniform(0, 10), 2) if n % 10 == 0 else None,
+                    "date_published": now - timedelta(minutes=n),
+                    "url": f"https://example.com/news/{n}",
+                }
+                for n in range(start, min(start + 5000, news))
+            ])
+
+        db.session.execute(insert(UserSavedStock), [
+            {"user_id": user_id, "stock_symbol": symbol, "date_added": now}
+            for user_id in range(1, users + 1)
+            for symbol in rng.sample(universe, min(watchlist, len(universe)))
+        ])
+        db.session.commit()
+
+        refresh_dashboard_sections()
+
+    print(f"🌱 Seeded {db_path}: users={users} watchlist={watchlist} news={news} "
+          f"strategy={strategy} symbols={symbols} in {time.monotonic() - started:.1f}s")
+    return universe
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_gunicorn(db_path, port, workers, threads):
+    command = [
+        sys.executable, "-m", "gunicorn", "webapp.app:app",
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers),
+        "--worker-class", "gthread",
+        "--threads", str(threads),
+        "--log-level", "warning",
+    ]
+    server = subprocess.Popen(command, env=_loadtest_env(db_path), cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.DEVNULL, start_new_session=True)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/robots.txt", timeout=2)
+            return server
+        except requests.RequestException:  # refused until bound, timeouts while workers import the app
+            time.sleep(0.2)
+    _stop_gunicorn(server)
+    raise RuntimeError("gunicorn did not start within 30s")
+
+
+def _stop_gunicorn(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    server.wait(timeout=30)
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.sql = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, response=None, error=False):
+        with self.lock:
+            if error or response is None or response.status_code >= 500:
+                self.errors[route] += 1
+                return
+            self.latencies[route].append(seconds * 1000)
+            if "X-SQL-Statements" in response.headers:
+                self.sql[route].append(int(response.headers["X-SQL-Statements"]))
+
+
+def _login(session, base_url, email):
+    page = session.get(f"{base_url}/login", timeout=30)
+    token = CSRF_TOKEN.search(page.text)
+    return session.post(f"{base_url}/login", data={
+        "csrf_token": token.group(1) if token else "",
+        "email": email,
+        "password": LOADTEST_PASSWORD,
+    }, allow_redirects=False, timeout=30)
+
+
+def _virtual_user(base_url, user_index, universe, mix, stop_at, results):
+    rng = random.Random(user_index)
+    routes, weights = zip(*mix.items())
+    email = f"user{user_index}@loadtest.example.com"
+    session = requests.Session()
+    if _login(session, base_url, email).status_code != 302:
+        print(f"❌ Virtual user {email} could not log in; was the database seeded with this many users?")
+        return
+
+    while time.monotonic() < stop_at:
+        route = rng.choices(routes, weights)[0]
+        symbol = rng.choice(universe)
+        started = time.perf_counter()
+        try:
+            if route == "home":
+                response = session.get(f"{base_url}/home", timeout=30)
+            elif route == "landing_snapshot":
+                response = session.get(f"{base_url}/landing_snapshot/{symbol}", timeout=30)
+            elif route == "save_stock":
+                response = session.post(f"{base_url}/save_stock", json={"symbol": symbol}, timeout=30)
+                if response.status_code == 200:
+                    session.post(f"{base_url}/remove_stock", json={"symbol": symbol}, timeout=30)
+            elif route == "login":
+                response = _login(requests.Session(), base_url, email)
+            else:
+                raise ValueError(f"Unknown route in mix: {route}")
+            results.record(route, time.perf_counter() - started, response)
+        except requests.RequestException:
+            results.record(route, time.perf_counter() - started, error=True)
+
+
+def _percentile(values, pct):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def report(results, duration, label=""):
+    print(f"\n📊 Load test results {label}".rstrip())
+    header = f"{'route':<18}{'reqs':>7}{'err':>5}{'rps':>8}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}{'sql':>7}"
+    print(header)
+    print("-" * len(header))
+    rows = {}
+    for route in sorted(set(results.latencies) | set(results.errors)):
+        latencies = sorted(results.latencies[route])
+        sql = results.sql[route]
+        if latencies:
+            row = {
+                "reqs": len(latencies),
+                "errors": results.errors[route],
+                "rps": len(latencies) / duration,
+                "p50": _percentile(latencies, 50),
+                "p90": _percentile(latencies, 90),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1],
+                "sql": statistics.mean(sql) if sql else float("nan"),
+            }
+        else:
+            row = {"reqs": 0, "errors": results.errors[route], "rps": 0.0, "p50": 0.0, "p90": 0.0,
+                   "p95": 0.0, "p99": 0.0, "max": 0.0, "sql": float("nan")}
+        rows[route] = row
+        print(f"{route:<18}{row['reqs']:>7}{row['errors']:>5}{row['rps']:>8.1f}{row['p50']:>9.1f}{row['p90']:>9.1f}"
+              f"{row['p95']:>9.1f}{row['p99']:>9.1f}{row['max']:>9.1f}{row['sql']:>7.1f}")
+    print("(latencies in ms; sql = mean statements per request)")
+    return rows
+
+
+def run(db_path, concurrency=20, duration=30, mix=DEFAULT_MIX, workers=2, threads=8, symbols=400, label=""):
+    """Starts gunicorn on the seeded database and drives it with `concurrency` logged-in clients."""
+    mix = {route: float(weight) for route, weight in (part.split("=") for part in mix.split(","))}
+    universe = _symbols(symbols)
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    server = _start_gunicorn(db_path, port, workers, threads)
+    try:
+        results = Results()
+        stop_at = time.monotonic() + duration
+        clients = [
+            threading.Thread(target=_virtual_user, args=(base_url, i, universe, mix, stop_at, results))
+            for i in range(concurrency)
+        ]
+        print(f"🚀 Driving {base_url} with {concurrency} clients for {duration}s (workers={workers}, threads={threads})")
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+    finally:
+        _stop_gunicorn(server)
+
+    return report(results, duration, label)
+
+
+def sweep(db_path, news_steps, users, watchlist, strategy, symbols, **run_args):
+    """Reseeds and reruns at each StockNews volume so regressions with data growth are visible."""
+    summary = {}
+    for news in news_steps:
+        seed(db_path, users=users, watchlist=watchlist, news=news, strategy=strategy, symbols=symbols)
+        summary[news] = run(db_path, symbols=symbols, label=f"(news={news:,})", **run_args)
+
+    print("\n📈 p95 latency (ms) by StockNews volume")
+    routes = sorted({route for rows in summary.values() for route in rows})
+    print(f"{'news rows':>12}" + "".join(f"{route:>18}" for route in routes))
+    for news, rows in summary.items():
+        print(f"{news:>12,}" + "".join(f"{rows.get(route, {}).get('p95', 0.0):>18.1f}" for route in routes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline route-level load test for the web app.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_seed_args(p):
+        p.add_argument("--users", type=int, default=200)
+        p.add_argument("--watchlist", type=int, default=5, help="saved stocks per user")
+        p.add_argument("--strategy", type=int, default=60, help="StockData rows in the strategy category")
+        p.add_argument("--symbols", type=int, default=400, help="size of the synthetic ticker universe")
+
+    def add_run_args(p):
+        p.add_argument("--concurrency", type=int, default=20)
+        p.add_argument("--duration", type=int, default=30, help="seconds")
+        p.add_argument("--mix", default=DEFAULT_MIX, help="route=weight,... (home, landing_snapshot, save_stock, login)")
+        p.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+        p.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+
+    seed_parser = sub.add_parser("seed", help="create a synthetic database")
+    seed_parser.add_argument("--db", default="loadtest.db")
+    seed_parser.add_argument("--news", type=int, default=50_000)
+    add_seed_args(seed_parser)
+
+    run_parser = sub.add_parser("run", help="load test an already seeded database")
+    run_parser.add_argument("--db", default="loadtest.db")
+    run_parser.add_argument("--symbols", type=int, default=400, help="must match the value used for seed")
+    add_run_args(run_parser)
+
+    sweep_parser = sub.add_parser("sweep", help="seed + run at several StockNews volumes")
+    sweep_parser.add_argument("--db", default="loadtest.db")
+    sweep_parser.add_argument("--news-steps", default="1000,10000,100000")
+    add_seed_args(sweep_parser)
+    add_run_args(sweep_parser)
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args.db, users=args.users, watchlist=args.watchlist, news=args.news,
+             strategy=args.strategy, symbols=args.symbols)
+    elif args.command == "run":
+        run(args.db, concurrency=args.concurrency, duration=args.duration, mix=args.mix,
+            workers=args.workers, threads=args.threads, symbols=args.symbols)
+    else:
+        sweep(args.db, [int(step) for step in args.news_steps.split(",")], users=args.users,
+              watchlist=args.watchlist, strategy=args.strategy, symbols=args.symbols,
+              concurrency=args.concurrency, duration=args.duration, mix=args.mix,
+              workers=args.workers, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()
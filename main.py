@@ -1,14 +1,12 @@
-from scraper import scrape_yahoo_finance
 from scraper import scrape_yahoo_indices
-from scraper import scrape_cnbc_news
-from scraper import scrape_marketwatch
 from scraper import scrape_yahoo_sectors
-from sentiment_analysis import analyze_daily_sentiment_gpt, analyze_weekly_sentiment_gpt
+from sentiment_analysis import analyze_daily_sentiment_gpt, analyze_daily_sentiment_map_reduce, analyze_weekly_sentiment_gpt
 from polygon_api import get_index_snapshot
-from polygon_api import format_etf_data
 from send_email import send_email
-from markdown import format_market_summary
-from stock_news_api import fetch_top_headlines, format_market_analysis
+from markdown import format_market_summary, render_summary_html
+from stock_news_api import fetch_top_headlines
+from prompt_builder import format_headlines, compact_etf_table
+from config import Config
 import json
 import os
 from datetime import datetime
@@ -17,12 +15,13 @@ import asyncio
 from webapp import create_app, db
 from webapp.models import User, StockData
 from daily_data import fetch_and_summarize_stock_news
+from market_digest import save_daily_digest, load_week_digests, format_week_digests
+from llm_telemetry import start_run, finish_run
 from sqlalchemy.orm import joinedload
 
 
 
 
-WEEKLY_DATA_FILE = "weekly_data.json"
 WEEKLY_REPORTS_FILE = "weekly_reports.json"
 
 app = create_app()
@@ -71,7 +70,7 @@ async def daily_tasks():
     sectors_data = scrape_yahoo_sectors()
     sector_summary = format_sector_performance(sectors_data)
     snapshot = get_index_snapshot()
-    indices = format_etf_data(snapshot)
+    indices = compact_etf_table(snapshot)
     # print(indices)
     # print(sector_summary)
 
@@ -96,10 +95,22 @@ async def daily_tasks():
     # marketwatch_headlines = [article["headline"] for article in news3 if isinstance(article, dict)]
 
     # Combine all headlines into one list
-    headlines = format_market_analysis(news)
+    headlines = format_headlines(news or [])
     # print(headlines)
     if headlines:
-        sentiment_summary = analyze_daily_sentiment_gpt(headlines, indices, sector_summary)
+        # The recap and the per-stock summaries are independent, so run them side by side
+        if Config.DAILY_RECAP_MODE == "map_reduce":
+            recap = analyze_daily_sentiment_map_reduce(news, indices, sector_summary)
+        else:
+            recap = asyncio.to_thread(analyze_daily_sentiment_gpt, headlines, indices, sector_summary)
+        sentiment_summary, _ = await asyncio.gather(recap, asyncio.to_thread(fetch_and_summarize_stock_news))
+        if not sentiment_summary:
+            # Every recap model failed: no digest, so the weekly report isn't built from a placeholder
+            return None
+
+        # Keep a compact digest of today for the weekly report
+        with app.app_context():
+            await save_daily_digest(sentiment_summary, snapshot, sectors_data)
         # print(f"\n {sentiment_summary}")
 
         # Save today's data
@@ -108,85 +119,84 @@ async def daily_tasks():
         # key_points = extract_key_points(sentiment_summary)
         # store_summary_key_points(key_points)
 
-        fetch_and_summarize_stock_news()  # This ensures stock summaries are up-to-date.
-
         return sentiment_summary
     else:
         print("No news articles found.")
 
-# Function to handle weekly tasks (reading weekly data, scraping weekend news, generating weekly summary)
+# Function to handle weekly tasks (this week's daily digests plus the weekend's top headlines, one GPT call)
 async def weekly_tasks():
-    today = datetime.now().strftime("%Y-%m-%d")
-    WEEKLY_DATA_FILE = "weekly_data.json"
-
-    # Get the weekly data from the JSON file
-    if os.path.exists(WEEKLY_DATA_FILE):
-        with open(WEEKLY_DATA_FILE, "r") as file:
-            weekly_data = json.load(file)
-    else:
-        print("No weekly data found.")
-        return
-
-    # Scrape the weekend news (Friday, Saturday, Sunday)
-    weekend_news1 = scrape_yahoo_finance()
-    weekend_news2 = scrape_cnbc_news()
-    weekend_news3 = scrape_marketwatch()
-
-    # Extract headlines for the weekend news
-    weekend_yahoo_headlines = [article["headline"] for article in weekend_news1 if isinstance(article, dict)]
-    weekend_cnbc_headlines = [article["headline"] for article in weekend_news2 if isinstance(article, dict)]
-    weekend_marketwatch_headlines = [article["headline"] for article in weekend_news3 if isinstance(article, dict)]
-
-    # Combine the weekend headlines into one list
-    weekend_headlines = weekend_yahoo_headlines + weekend_cnbc_headlines + weekend_marketwatch_headlines
-
-    if weekend_headlines:
-        sentiment_summary = analyze_weekly_sentiment_gpt(weekend_headlines, weekly_data)
+    start_run("weekly")
+    try:
+        with app.app_context():
+            digests = load_week_digests()
+        if not digests:
+            print("No daily digests found for this week.")
+            return
+        print(f"🗒️ Building the weekly report from {len(digests)} daily digests "
+              f"({sum(row.tokens or 0 for row in digests)} tokens).")
+
+        # Weekend headlines from one ranked StockNewsAPI request
+        weekend_news = fetch_top_headlines(limit=Config.WEEKLY_HEADLINE_LIMIT) or []
+        weekend_headlines = [article["headline"] for article in weekend_news if article.get("type") != "Video"]
+
+        sentiment_summary = analyze_weekly_sentiment_gpt(weekend_headlines, format_week_digests(digests))
         print(f"\n {sentiment_summary}")
 
         # Save the weekly report
         save_weekly_report(sentiment_summary)
         return sentiment_summary
-    else:
-        print("No weekend news found.")
+    finally:
+        with app.app_context():
+            finish_run()
 
 async def main():
     print("Starting main function...")
-    
-    daily_market_update = await daily_tasks()
-
-    print(f"Market Update: {daily_market_update}") 
-
-    with app.app_context():
-        users = User.query.options(joinedload(User.saved_stocks)).all()
-
-        print("Sending personalized emails....")
-
-        for user in users:
-            if user.subscription_status not in ["active", "free"]:
-                continue
-
-            # ✅ Fetch user's tracked stocks
-            tracked_stocks = [row.stock_symbol for row in user.saved_stocks]
-
-            # ✅ Retrieve summaries for the user's stocks
-            user_stock_summaries = []
-            for symbol in tracked_stocks:
-                stock_entry = StockData.query.filter_by(symbol=symbol).first()
-                if stock_entry and stock_entry.summary_text:
-                    user_stock_summaries.append(f"{symbol}: {stock_entry.summary_text}")
-
-            # ✅ Format the entire email using one function
-            styled_email = format_market_summary(daily_market_update, user_stock_summaries)
-
-            # ✅ Send the email
-            try:
-                result = send_email("📊 Your Daily Market Update", styled_email, user.email)
-                print(f"✅ Email sent to {user.email}")
-            except Exception as e:
-                print(f"❌ Error sending to {user.email}: {e}")
-
-    print("✅ All emails sent!")
+    start_run("daily")
+    emails_sent = 0
+    try:
+        daily_market_update = await daily_tasks()
+        if not daily_market_update:
+            print("❌ No daily market recap today. Not sending the newsletter.")
+            return
+
+        print(f"Market Update: {daily_market_update}") 
+
+        with app.app_context():
+            users = User.query.options(joinedload(User.saved_stocks)).all()
+
+            print("Sending personalized emails....")
+
+            for user in users:
+                if user.subscription_status not in ["active", "free"]:
+                    continue
+
+                # ✅ Fetch user's tracked stocks
+                tracked_stocks = [row.stock_symbol for row in user.saved_stocks]
+
+                # ✅ Retrieve summaries for the user's stocks
+                user_stock_summaries = []
+                for symbol in tracked_stocks:
+                    stock_entry = StockData.query.filter_by(symbol=symbol).first()
+                    if stock_entry and stock_entry.summary_text:
+                        summary_html = stock_entry.summary_html or render_summary_html(stock_entry.summary_text)[0]
+                        user_stock_summaries.append((symbol, summary_html))
+
+                # ✅ Format the entire email using one function
+                styled_email = format_market_summary(daily_market_update, user_stock_summaries)
+
+                # ✅ Send the email
+                try:
+                    result = send_email("📊 Your Daily Market Update", styled_email, user.email)
+                    print(f"✅ Email sent to {user.email}")
+                    emails_sent += 1
+                except Exception as e:
+                    print(f"❌ Error sending to {user.email}: {e}")
+
+        print("✅ All emails sent!")
+    finally:
+        # Also on failure: the buffered llm_call rows are the cost of the failed run
+        with app.app_context():
+            finish_run(newsletters=emails_sent)
 
 if __name__ == "__main__":
     if is_weekday():
@@ -22,13 +22,13 @@ def format_market_summary(market_summary, stock_summaries=None):
 
     if stock_summaries:
         html_parts.append("<h2 style='font-size: 20px; margin-bottom: 10px;'>Stocks You're Following</h2>")
-        for stock in stock_summaries:
-            stock_symbol, stock_details = stock.split(":", 1)
+        # stock_summaries: (symbol, summary_html) pairs, rendered once when the summary was saved
+        for stock_symbol, stock_html in stock_summaries:
             html_parts.append(f"""
                 <div style='margin-bottom: 22px; padding-bottom: 6px; border-bottom: 1px solid #eee;'>
                     <div style='font-size: 15px; color: #333;'>
-                        <p style='font-size: 20px; font-weight: bold; margin: 0 0 2px; color: #111;'>{stock_symbol.strip()}</p>
-                        {convert_markdown_to_html(stock_details.strip())}
+                        <p style='font-size: 20px; font-weight: bold; margin: 0 0 2px; color: #111;'>{stock_symbol}</p>
+                        {stock_html}
                     </div>
                 </div>
             """)
@@ -103,4 +103,15 @@ def convert_markdown_to_html(text):
         else:
             html_parts.append(f"<p style='line-height: 1.6; font-size: 16px; color: #333;'>{line}</p>")
 
-    return "\n".join(html_parts)
\ No newline at end of file
+    return "\n".join(html_parts)
+
+HEADING_TAGS = re.compile(r'<h[1-6][^>]*>.*?</h[1-6]>', flags=re.DOTALL)
+
+
+def render_summary_html(summary_text):
+    """
+    Renders a stock summary once at write time.
+    Returns (html, html_without_headings) for StockData.summary_html / summary_html_no_headings.
+    """
+    html = convert_markdown_to_html(summary_text or "")
+    return html, HEADING_TAGS.sub('', html).strip()
@@ -0,0 +1,158 @@
+import json
+import re
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from config import Config
+from llm import complete_many, count_tokens, truncate_tokens
+from webapp import db
+from webapp.models import MarketDigest
+from webapp.bulk import upsert_rows
+
+SENTIMENTS = ("Bullish", "Bearish", "Neutral", "Mixed")
+# List fields the model fills in, and how many items each keeps
+DIGEST_LISTS = {"key_points": 5, "catalysts": 3, "watch": 3}
+DIGEST_ITEM_TOKENS = 40
+
+_PERCENT = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def trading_date():
+    return datetime.now(ZoneInfo("America/New_York")).date()
+
+
+def index_moves(df_snapshots):
+    """{ticker: daily % change} from polygon_api.get_index_snapshot()."""
+    if df_snapshots is None or len(df_snapshots) == 0:
+        return {}
+    return {str(row["Ticker"]): round(float(row["Change (%)"]), 2) for _, row in df_snapshots.iterrows()}
+
+
+def sector_extremes(sectors, count=3):
+    """The `count` best and worst sectors from scraper.scrape_yahoo_sectors() as (leaders, laggards)."""
+    moves = []
+    for sector in sectors or []:
+        match = _PERCENT.search(str(sector.get("percent_change", "")))
+        if match:
+            moves.append((sector["sector"], float(match.group())))
+    moves.sort(key=lambda move: move[1], reverse=True)
+    leaders = [[name, change] for name, change in moves[:count]]
+    laggards = [[name, change] for name, change in list(reversed(moves[count:]))[:count]]
+    return leaders, laggards
+
+
+def build_digest_prompt(recap):
+    return f"""
+    Below is today's market recap. Reduce it to a compact digest that a weekly report will be written from.
+
+    Respond with a JSON object only:
+    {{"sentiment": "Bullish" | "Bearish" | "Neutral" | "Mixed",
+      "headline": "<the day in one sentence>",
+      "key_points": ["<up to 5 short facts: what moved and why, with numbers>"],
+      "catalysts": ["<up to 3 events that drove the market>"],
+      "watch": ["<up to 3 things to watch next>"]}}
+
+    Recap:
+    {recap}
+    """
+
+
+def parse_digest(text):
+    """The model's JSON digest, validated and capped; None if it's unusable."""
+    try:
+        payload = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("headline"), str):
+        return None
+
+    digest = {
+        "sentiment": payload.get("sentiment") if payload.get("sentiment") in SENTIMENTS else None,
+        "headline": truncate_tokens(payload["headline"].strip(), DIGEST_ITEM_TOKENS),
+    }
+    for field, limit in DIGEST_LISTS.items():
+        items = payload.get(field) if isinstance(payload.get(field), list) else []
+        digest[field] = [truncate_tokens(item.strip(), DIGEST_ITEM_TOKENS) for item in items if isinstance(item, str)][:limit]
+    return digest
+
+
+def fallback_digest(recap):
+    """Digest without the model: the recap's first paragraph as the headline."""
+    body = re.sub(r"^#+.*$", "", recap or "", flags=re.MULTILINE).strip()
+    first_paragraph = body.split("\n\n")[0] if body else ""
+    return {"sentiment": None, "headline": truncate_tokens(first_paragraph, DIGEST_ITEM_TOKENS * 2),
+            **{field: [] for field in DIGEST_LISTS}}
+
+
+async def build_digest(recap, df_snapshots, sectors):
+    """
+    Structured digest of the day: index moves and sector leaders/laggards from the data already fetched,
+    plus sentiment, a one-line headline, key points, catalysts and what to watch, extracted from the
+    recap by DIGEST_MODEL in JSON mode.
+    """
+    messages = [
+        {"role": "system", "content": "You extract structured market data from analyst write-ups."},
+        {"role": "user", "content": build_digest_prompt(recap)},
+    ]
+    response = await complete_many({"digest": messages}, model=Config.DIGEST_MODEL, max_tokens=500,
+                                   response_format={"type": "json_object"}, job="market_digest")
+    digest = parse_digest(response.get("digest"))
+    if digest is None:
+        print("⚠️ Could not extract a structured digest from the recap, keeping its first paragraph.")
+        digest = fallback_digest(recap)
+
+    leaders, laggards = sector_extremes(sectors)
+    digest.update(index_moves=index_moves(df_snapshots), sector_leaders=leaders, sector_laggards=laggards)
+    return digest
+
+
+def _signed(value, suffix=""):
+    return f"{value:+.2f}{suffix}"
+
+
+def format_digest(day, digest):
+    """One day's digest as a few compact lines for the weekly prompt."""
+    lines = [f"{day:%Y-%m-%d (%a)} — {digest.get('sentiment') or 'n/a'}: {digest.get('headline', '')}"]
+    if digest.get("index_moves"):
+        lines.append("Indices: " + ", ".join(f"{ticker} {_signed(change)}%"
+                                             for ticker, change in digest["index_moves"].items()))
+    if digest.get("sector_leaders"):
+        lines.append("Sectors: leaders " + ", ".join(f"{name} {_signed(change)}%" for name, change in digest["sector_leaders"])
+                     + "; laggards " + ", ".join(f"{name} {_signed(change)}%" for name, change in digest.get("sector_laggards", [])))
+    for field, label in (("key_points", "Key points"), ("catalysts", "Catalysts"), ("watch", "Watch")):
+        if digest.get(field):
+            lines.append(f"{label}: " + "; ".join(digest[field]))
+    return "\n".join(lines)
+
+
+def store_digest(day, digest):
+    """Upserts the day's digest (one row per trading date) and commits."""
+    upsert_rows(MarketDigest, [{
+        "trading_date": day,
+        "sentiment": digest.get("sentiment"),
+        "payload": digest,
+        "tokens": count_tokens(format_digest(day, digest)),
+        "created_at": datetime.utcnow(),
+    }], ["trading_date"])
+    db.session.commit()
+
+
+async def save_daily_digest(recap, df_snapshots, sectors):
+    """Called once the daily recap exists; the weekly report is built from these rows."""
+    day = trading_date()
+    digest = await build_digest(recap, df_snapshots, sectors)
+    store_digest(day, digest)
+    print(f"🗒️ Saved the {day} market digest ({count_tokens(format_digest(day, digest))} tokens).")
+    return digest
+
+
+def load_week_digests(end_date=None, days=7):
+    """The digests from the `days` days up to `end_date` (today), oldest first."""
+    end_date = end_date or trading_date()
+    return MarketDigest.query.filter(
+        MarketDigest.trading_date > end_date - timedelta(days=days),
+        MarketDigest.trading_date <= end_date
+    ).order_by(MarketDigest.trading_date).all()
+
+
+def format_week_digests(digests):
+    return "\n\n".join(format_digest(row.trading_date, row.payload) for row in digests)
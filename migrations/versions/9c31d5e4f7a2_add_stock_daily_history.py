@@ -0,0 +1,73 @@
+"""Add append-only stock_daily_history, partitioned by month on Postgres
+
+Revision ID: 9c31d5e4f7a2
+Revises: 4b7e2a91c0d3
+Create Date: 2026-10-19 10:04:52.771930
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c31d5e4f7a2'
+down_revision = '4b7e2a91c0d3'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS_SQL = """
+    symbol VARCHAR(10) NOT NULL,
+    trading_date DATE NOT NULL,
+    open DOUBLE PRECISION,
+    high DOUBLE PRECISION,
+    low DOUBLE PRECISION,
+    close DOUBLE PRECISION NOT NULL,
+    volume BIGINT,
+    change_percent DOUBLE PRECISION,
+    rsi DOUBLE PRECISION,
+    macd DOUBLE PRECISION,
+    macd_signal DOUBLE PRECISION,
+    macd_histogram DOUBLE PRECISION,
+    rvol DOUBLE PRECISION,
+    support DOUBLE PRECISION,
+    resistance DOUBLE PRECISION,
+    tags_mask INTEGER NOT NULL DEFAULT 0,
+    strategy_label VARCHAR(100),
+    confidence_score DOUBLE PRECISION,
+    recorded_at TIMESTAMP WITHOUT TIME ZONE,
+    PRIMARY KEY (symbol, trading_date)
+"""
+
+
+def _month_start(day, offset=0):
+    month_index = day.year * 12 + (day.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"CREATE TABLE stock_daily_history ({COLUMNS_SQL}) PARTITION BY RANGE (trading_date)")
+
+        # Current and next month; stock_history.ensure_history_partitions() adds the rest.
+        today = date.today()
+        for offset in (0, 1):
+            start = _month_start(today, offset)
+            end = _month_start(today, offset + 1)
+            op.execute(
+                f"CREATE TABLE stock_daily_history_y{start.year}m{start.month:02d} "
+                f"PARTITION OF stock_daily_history FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+    else:
+        op.execute(f"CREATE TABLE stock_daily_history ({COLUMNS_SQL})")
+
+    op.create_index('ix_stock_daily_history_trading_date', 'stock_daily_history', ['trading_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_daily_history_trading_date', table_name='stock_daily_history')
+    # Dropping a partitioned parent drops its partitions too.
+    op.drop_table('stock_daily_history')
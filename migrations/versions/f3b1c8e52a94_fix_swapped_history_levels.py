@@ -0,0 +1,30 @@
+"""Swap support/resistance on stock_daily_history rows recorded in the wrong order
+
+Revision ID: f3b1c8e52a94
+Revises: e8a6f3c1d702
+Create Date: 2026-10-19 23:12:40.118302
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b1c8e52a94'
+down_revision = 'e8a6f3c1d702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # fetch_support_resistance() used to return (resistance, support), so rows written before the fix
+    # have the 30-day high under support. Support is a min of lows and resistance a max of highs, so a
+    # row with support > resistance can only be one of those.
+    op.execute(
+        "UPDATE stock_daily_history SET support = resistance, resistance = support "
+        "WHERE support > resistance"
+    )
+
+
+def downgrade():
+    # Data fix only; the swapped values aren't worth restoring
+    pass
@@ -0,0 +1,190 @@
+import re
+import time
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+from config import Config
+from webapp.models import StockNews
+
+_TOKEN = re.compile(r"\$?[a-z0-9]+(?:['.&-][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+    an and are as at be by for from has have in into is it its of on or over than that the this to was were
+    will with after about amid says said new co corp corporation inc incorporated ltd plc llc class common
+    stock stocks shares share holdings group company companies
+""".split())
+
+
+def tokenize(text):
+    return [token.lstrip("$") for token in _TOKEN.findall((text or "").lower()) if token.lstrip("$") not in STOPWORDS]
+
+
+def article_tokens(article):
+    """Headline counted twice, so a ticker in the headline outweighs one in passing in the description."""
+    headline = tokenize(article.headline)
+    return headline + headline + tokenize(article.description)
+
+
+def query_terms(symbol, name):
+    """What a relevant article mentions: the ticker and the distinctive words of the company name."""
+    return {symbol.lower(), *tokenize(name)}
+
+
+class IDFTable:
+    """Document frequencies over recent StockNews (headline + description), for BM25 and TF-IDF weights."""
+
+    def __init__(self, documents, built_on):
+        self.built_on = built_on
+        self.vocab = {}
+        term_ids = []
+        lengths = []
+        for tokens in documents:
+            term_ids.extend(self.vocab.setdefault(token, len(self.vocab)) for token in set(tokens))
+            lengths.append(len(tokens))
+        self.n_docs = len(documents)
+        self.df = np.bincount(np.asarray(term_ids, dtype=np.int64), minlength=len(self.vocab)).astype(np.float64)
+        self.avgdl = float(np.mean(lengths)) if lengths else 1.0
+
+    def idf(self, df):
+        return np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+
+
+_idf_table = None
+
+
+def get_idf_table(now_utc):
+    """The IDF table, rebuilt from the last NEWS_IDF_DAYS of StockNews once per (New York) day."""
+    global _idf_table
+    today = now_utc.astimezone(ZoneInfo("America/New_York")).date()
+    if _idf_table is None or _idf_table.built_on != today:
+        started = time.monotonic()
+        rows = StockNews.query.with_entities(StockNews.headline, StockNews.description).filter(
+            StockNews.date_published >= now_utc - timedelta(days=Config.NEWS_IDF_DAYS)
+        ).all()
+        _idf_table = IDFTable([tokenize(f"{headline} {description or ''}") for headline, description in rows], today)
+        print(f"📚 Rebuilt news IDF from {_idf_table.n_docs:,} articles ({len(_idf_table.vocab):,} terms) "
+              f"in {time.monotonic() - started:.1f}s.")
+    return _idf_table
+
+
+class SparseDocs:
+    """
+    Term counts of a set of articles as a sparse COO matrix (doc, term, tf arrays). Terms the IDF
+    table has never seen get new columns with a document frequency of 0.
+    """
+
+    def __init__(self, token_lists, idf_table):
+        vocab = dict(idf_table.vocab)
+        docs, terms = [], []
+        for doc, tokens in enumerate(token_lists):
+            docs.extend([doc] * len(tokens))
+            terms.extend(vocab.setdefault(token, len(vocab)) for token in tokens)
+        self.vocab = vocab
+        self.n_docs = len(token_lists)
+        width = max(len(vocab), 1)
+
+        keys, tf = np.unique(np.asarray(docs, dtype=np.int64) * width + np.asarray(terms, dtype=np.int64),
+                             return_counts=True)
+        self.width = width
+        self.doc = keys // width
+        self.term = keys % width
+        self.tf = tf.astype(np.float64)
+        self.length = np.bincount(np.asarray(docs, dtype=np.int64), minlength=self.n_docs).astype(np.float64)
+
+        df = np.zeros(width)
+        df[:len(idf_table.df)] = idf_table.df
+        self.idf = idf_table.idf(df)
+        self.avgdl = idf_table.avgdl
+
+    def bm25(self, query_keys, doc_groups):
+        """Per-doc BM25 score against its group's query terms; query_keys are group * width + term ids."""
+        k1, b = Config.NEWS_BM25_K1, Config.NEWS_BM25_B
+        norm = k1 * (1 - b + b * self.length[self.doc] / self.avgdl)
+        weights = self.idf[self.term] * self.tf * (k1 + 1) / (self.tf + norm)
+        matched = np.isin(doc_groups[self.doc] * self.width + self.term, query_keys)
+        return np.bincount(self.doc[matched], weights=weights[matched], minlength=self.n_docs)
+
+    def cosine(self, doc_ids):
+        """Pairwise cosine similarity of the given docs' L2-normalised TF-IDF vectors."""
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        rows = np.full(self.n_docs, -1)
+        rows[doc_ids] = np.arange(len(doc_ids))
+        selected = rows[self.doc] >= 0
+        columns, local_terms = np.unique(self.term[selected], return_inverse=True)
+        matrix = np.zeros((len(doc_ids), len(columns)))
+        matrix[rows[self.doc[selected]], local_terms] = (1 + np.log(self.tf[selected])) * self.idf[self.term[selected]]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        return matrix @ matrix.T
+
+
+def rank_symbol_news(candidates, history, names, now_utc, per_symbol=3):
+    """
+    Picks each symbol's `per_symbol` articles for the summary prompt from {symbol: [StockNews]} candidates:
+    - relevance: BM25 of the article against the ticker and company name, normalised per symbol,
+    - novelty: 1 - the highest cosine similarity to the symbol's coverage from the previous days (`history`),
+    - rankscore: StockNewsAPI's rank where present, normalised per symbol (0 for Polygon rows),
+    blended as relevance * (NEWS_RELEVANCE_WEIGHT + NEWS_NOVELTY_WEIGHT * novelty) + NEWS_RANKSCORE_WEIGHT
+    * rankscore; then near-duplicates (cosine >= NEWS_DUPLICATE_SIMILARITY to
+    an article already picked) are dropped.
+    """
+    symbols = [symbol for symbol in candidates if candidates[symbol]]
+    if not symbols:
+        return {}
+    started = time.monotonic()
+    idf_table = get_idf_table(now_utc)
+
+    articles, groups, is_candidate = [], [], []
+    for group, symbol in enumerate(symbols):
+        for article in candidates[symbol]:
+            articles.append(article)
+            groups.append(group)
+            is_candidate.append(True)
+        for article in history.get(symbol, []):
+            articles.append(article)
+            groups.append(group)
+            is_candidate.append(False)
+    groups = np.asarray(groups, dtype=np.int64)
+    is_candidate = np.asarray(is_candidate)
+
+    docs = SparseDocs([article_tokens(article) for article in articles], idf_table)
+    query_keys = np.asarray([
+        group * docs.width + docs.vocab[term]
+        for group, symbol in enumerate(symbols)
+        for term in query_terms(symbol, names.get(symbol)) if term in docs.vocab
+    ], dtype=np.int64)
+    relevance = docs.bm25(query_keys, groups)
+
+    picked = {}
+    dropped = 0
+    for group, symbol in enumerate(symbols):
+        doc_ids = np.flatnonzero(groups == group)
+        candidate_rows = np.flatnonzero(is_candidate[doc_ids])
+        history_rows = np.flatnonzero(~is_candidate[doc_ids])
+        similarity = docs.cosine(doc_ids)
+
+        scores = relevance[doc_ids[candidate_rows]]
+        scores = scores / scores.max() if scores.max() > 0 else scores
+        if len(history_rows):
+            novelty = 1 - similarity[np.ix_(candidate_rows, history_rows)].max(axis=1)
+        else:
+            novelty = np.ones(len(candidate_rows))
+        rankscores = np.asarray([articles[doc].rankscore or 0.0 for doc in doc_ids[candidate_rows]])
+        rankscores = rankscores / rankscores.max() if rankscores.max() > 0 else rankscores
+        # Novelty only counts for relevant articles: a fresh story about another company shouldn't win
+        blended = (scores * (Config.NEWS_RELEVANCE_WEIGHT + Config.NEWS_NOVELTY_WEIGHT * novelty)
+                   + Config.NEWS_RANKSCORE_WEIGHT * rankscores)
+
+        kept = []
+        for row in candidate_rows[np.argsort(-blended, kind="stable")]:
+            if len(kept) == per_symbol:
+                break
+            if kept and similarity[row, kept].max() >= Config.NEWS_DUPLICATE_SIMILARITY:
+                dropped += 1
+                continue
+            kept.append(row)
+        picked[symbol] = [articles[doc_ids[row]] for row in kept]
+
+    print(f"🔎 Ranked {int(is_candidate.sum())} candidate articles for {len(symbols)} symbols "
+          f"({len(articles) - int(is_candidate.sum())} from earlier days for novelty), dropped {dropped} "
+          f"near-duplicates, in {time.monotonic() - started:.2f}s.")
+    return picked
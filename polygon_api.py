@@ -220,6 +220,59 @@ def get_news_for_ticker(ticker, limit=5, days_range=10):
     else:
         return []
 
+def get_reference_tickers(market="stocks", page_size=1000, retries=3):
+    """
+    Fetch every active ticker from Polygon's reference API, following next_url pagination.
+    Returns a list of dicts: symbol, name, exchange, type. The list endpoint has no market cap;
+    see get_ticker_market_cap().
+    A page that still fails after `retries` attempts raises requests.HTTPError rather than
+    returning a partial list, since callers treat the result as the complete universe.
+    """
+    url = f'https://api.polygon.io/v3/reference/tickers?market={market}&active=true&limit={page_size}&apiKey={api_key}'
+    tickers = []
+
+    while url:
+        for attempt in range(1, retries + 1):
+            response = requests.get(url, timeout=30)
+            if (response.status_code != 429 and response.status_code < 500) or attempt == retries:
+                break
+            print(f"⚠️ Reference tickers page returned {response.status_code}, retrying ({attempt}/{retries})...")
+            time.sleep(5 * 2 ** (attempt - 1))
+        if response.status_code != 200:
+            print(f"❌ Error fetching reference tickers: {response.status_code} after {len(tickers)} tickers")
+            response.raise_for_status()
+            raise requests.HTTPError(f"Unexpected status {response.status_code} for reference tickers", response=response)
+
+        data = response.json()
+        for item in data.get('results', []):
+            tickers.append({
+                "symbol": item.get('ticker'),
+                "name": item.get('name'),
+                "exchange": item.get('primary_exchange'),
+                "type": item.get('type'),
+            })
+
+        next_url = data.get('next_url')
+        url = f"{next_url}&apiKey={api_key}" if next_url else None
+
+    return tickers
+
+def get_ticker_market_cap(ticker):
+    """
+    Market cap of one ticker from Polygon's ticker details endpoint, or None when it has none
+    (ETFs, funds) or the request fails.
+    """
+    url = f'https://api.polygon.io/v3/reference/tickers/{ticker}?apiKey={api_key}'
+    try:
+        response = requests.get(url, timeout=10)
+    except requests.RequestException as e:
+        print(f"❌ Error fetching ticker details for {ticker}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"❌ Error fetching ticker details for {ticker}: {response.status_code}")
+        return None
+    return response.json().get('results', {}).get('market_cap')
+
 def get_top_movers_news(direction='gainers'):
     """
     Fetch the top movers and their news headlines using Polygon's News API.
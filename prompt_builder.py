@@ -0,0 +1,218 @@
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from config import Config
+from llm import count_tokens, truncate_tokens
+
+_WORD = re.compile(r"[a-z0-9$%.]+")
+
+
+def _field(article, name):
+    """Reads a field from a StockNewsAPI dict or a StockNews row."""
+    if isinstance(article, dict):
+        return article.get(name)
+    if name == "date":
+        return getattr(article, "date_published", None)
+    return getattr(article, name, None)
+
+
+def _published_at(article):
+    value = _field(article, "date")
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            return parsedate_to_datetime(value)  # StockNewsAPI: "Mon, 20 Oct 2025 09:30:00 -0400"
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _rankscore(article):
+    try:
+        return float(_field(article, "rankscore"))
+    except (TypeError, ValueError):
+        return None  # Polygon rows, or "No rank score available"
+
+
+def article_score(article, now=None):
+    """rankscore (1.0 when missing) halved every PROMPT_RECENCY_HALF_LIFE_HOURS of age."""
+    now = now or datetime.now(timezone.utc)
+    score = _rankscore(article)
+    score = 1.0 if score is None else score
+    published = _published_at(article)
+    if published is not None:
+        age_hours = max(0.0, (now - published).total_seconds() / 3600)
+        score *= 0.5 ** (age_hours / Config.PROMPT_RECENCY_HALF_LIFE_HOURS)
+    return score
+
+
+def _headline_words(headline):
+    return set(_WORD.findall((headline or "").lower()))
+
+
+def is_near_duplicate(words, seen, threshold=None):
+    """True if the headline's word set overlaps (Jaccard) an earlier one by at least `threshold`."""
+    threshold = threshold or Config.PROMPT_DEDUPE_THRESHOLD
+    for other in seen:
+        union = len(words | other)
+        if union and len(words & other) / union >= threshold:
+            return True
+    return False
+
+
+def select_articles(articles, max_tokens, description_tokens=None, include_rankscore=True, ranked=False):
+    """
+    Highest-signal articles first (rankscore/recency, or the given order if `ranked`), near-duplicate
+    headlines and videos dropped, descriptions cut to `description_tokens`, skipping entries that would
+    take the section over `max_tokens`. Returns the formatted entries.
+    """
+    description_tokens = description_tokens or Config.PROMPT_DESCRIPTION_TOKENS
+    now = datetime.now(timezone.utc)
+    articles = [article for article in articles if _field(article, "type") != "Video"]
+    if not ranked:
+        articles = sorted(articles, key=lambda article: article_score(article, now), reverse=True)
+
+    entries = []
+    seen = []
+    used = 0
+    for article in articles:
+        headline = (_field(article, "headline") or "").strip()
+        if not headline:
+            continue
+        words = _headline_words(headline)
+        if is_near_duplicate(words, seen):
+            continue
+
+        lines = [f"Headline: {headline}"]
+        description = (_field(article, "description") or "").strip()
+        if description:
+            lines.append(f"Description: {truncate_tokens(description, description_tokens)}")
+        rankscore = _rankscore(article)
+        if include_rankscore and rankscore is not None:
+            lines.append(f"Rank Score: {rankscore:g}")
+        entry = "\n".join(lines)
+
+        cost = count_tokens(entry) + 2
+        if used + cost > max_tokens:
+            continue  # a shorter, lower-ranked entry may still fit
+        entries.append(entry)
+        seen.append(words)
+        used += cost
+    return entries
+
+
+def format_headlines(articles, max_tokens=None, description_tokens=None):
+    """Budgeted replacement for stock_news_api.format_market_analysis."""
+    entries = select_articles(articles, max_tokens or Config.PROMPT_HEADLINE_TOKENS, description_tokens)
+    print(f"🧮 Headlines: kept {len(entries)}/{len(articles)} articles within the token budget.")
+    return "\n\n".join(entries)
+
+
+def format_stock_news(articles, max_tokens=None, ranked=False):
+    """A symbol's news for the summary prompt, on one line, within PROMPT_STOCK_NEWS_TOKENS."""
+    entries = select_articles(articles, max_tokens or Config.PROMPT_STOCK_NEWS_TOKENS, include_rankscore=False,
+                              ranked=ranked)
+    return " ".join(entry.replace("Headline: ", "").replace("\nDescription: ", ": ") for entry in entries)
+
+
+def dedupe_headlines(headlines, max_tokens=None):
+    """Plain headline strings (scraped), near-duplicates removed, in order, within budget."""
+    max_tokens = max_tokens or Config.PROMPT_HEADLINE_TOKENS
+    kept, seen, used = [], [], 0
+    for headline in headlines:
+        words = _headline_words(headline)
+        if not words or is_near_duplicate(words, seen):
+            continue
+        cost = count_tokens(headline) + 1
+        if used + cost > max_tokens:
+            continue
+        kept.append(headline)
+        seen.append(words)
+        used += cost
+    return kept
+
+
+# Theme -> keywords for clustering headlines; the first theme with the most keyword hits wins
+HEADLINE_THEMES = {
+    "Fed, rates & inflation": {"fed", "fomc", "powell", "rate", "rates", "yield", "yields", "treasury", "treasuries",
+                               "bond", "bonds", "inflation", "cpi", "pce", "ppi"},
+    "Economy & jobs": {"jobs", "payrolls", "unemployment", "jobless", "gdp", "economy", "economic", "recession",
+                       "consumer", "spending", "housing", "manufacturing", "pmi", "sales"},
+    "Earnings & guidance": {"earnings", "revenue", "guidance", "quarter", "quarterly", "eps", "profit", "results",
+                            "beats", "misses", "outlook", "forecast"},
+    "Tech & AI": {"ai", "chip", "chips", "semiconductor", "semiconductors", "nvidia", "apple", "microsoft", "google",
+                  "alphabet", "amazon", "meta", "tesla", "tech", "software", "cloud"},
+    "Energy & commodities": {"oil", "crude", "opec", "gas", "gold", "silver", "copper", "commodities", "commodity",
+                             "energy", "brent"},
+    "Policy & geopolitics": {"tariff", "tariffs", "trade", "china", "war", "sanctions", "election", "congress",
+                             "tax", "government", "shutdown", "trump", "regulators", "sec"},
+    "Crypto": {"bitcoin", "crypto", "ethereum", "btc", "blockchain"},
+    "Deals & corporate": {"merger", "acquisition", "acquire", "deal", "ipo", "buyback", "layoffs", "ceo", "stake"},
+}
+OTHER_THEME = "Other market news"
+
+
+def headline_theme(article):
+    words = _headline_words(f"{_field(article, 'headline') or ''} {_field(article, 'description') or ''}")
+    best, best_hits = OTHER_THEME, 0
+    for theme, keywords in HEADLINE_THEMES.items():
+        hits = len(words & keywords)
+        if hits > best_hits:
+            best, best_hits = theme, hits
+    return best
+
+
+def cluster_headlines(articles, min_size=None):
+    """
+    Articles grouped by theme (keyword hits on headline + description), largest theme first.
+    Themes with fewer than RECAP_MIN_CLUSTER_SIZE articles are folded into "Other market news".
+    """
+    min_size = min_size or Config.RECAP_MIN_CLUSTER_SIZE
+    clusters = {}
+    for article in articles:
+        if _field(article, "type") == "Video":
+            continue
+        clusters.setdefault(headline_theme(article), []).append(article)
+
+    for theme in [theme for theme, items in clusters.items() if theme != OTHER_THEME and len(items) < min_size]:
+        clusters.setdefault(OTHER_THEME, []).extend(clusters.pop(theme))
+    return dict(sorted(clusters.items(), key=lambda item: (item[0] == OTHER_THEME, -len(item[1]))))
+
+
+def _compact_number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "-"
+    for threshold, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"{value / threshold:.1f}{suffix}"
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def compact_etf_table(df_snapshots):
+    """polygon_api.get_index_snapshot() as one pipe-separated row per ETF instead of eleven labelled lines."""
+    if df_snapshots is None or len(df_snapshots) == 0:
+        return ""
+    lines = ["ETF|Tracks|Price|Chg%|High|Low|PrevClose|1M%|Vol|Vol vs 1M avg%"]
+    for _, row in df_snapshots.iterrows():
+        tracks = str(row["Sector/Decor"]).split(" (")[0].replace(" Select Sector SPDR Fund", "").replace(" ETF", "")
+        lines.append("|".join([
+            str(row["Ticker"]),
+            tracks,
+            _compact_number(row["Current Price"]),
+            f"{float(row['Change (%)']):+.2f}",
+            _compact_number(row["High of the Day ($)"]),
+            _compact_number(row["Low of the Day ($)"]),
+            _compact_number(row["Previous Close ($)"]),
+            f"{float(row['Monthly Change (%)']):+.1f}",
+            _compact_number(row["Volume"]),
+            f"{float(row['Volume Change (%)']):+.0f}",
+        ]))
+    return "\n".join(lines)
+
+
+def fit_to_budget(text, max_tokens):
+    """Any other prompt section, cut to `max_tokens`."""
+    return truncate_tokens(text or "", max_tokens)
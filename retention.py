@@ -0,0 +1,27 @@
+import time
+from config import Config
+from daily_data import app, delete_old_news
+from webapp.dashboard import refresh_dashboard_sections
+
+
+def run_news_retention(days_old=None):
+    """
+    Runs StockNews retention on its own schedule and reports rows removed and time taken.
+    Never deletes news the ranker still reads (see NEWS_RETENTION_DAYS in config.py).
+    """
+    days_old = max(days_old or 0, Config.NEWS_RETENTION_DAYS)
+
+    with app.app_context():
+        started = time.monotonic()
+        result = delete_old_news(days_old=days_old, batch_size=Config.NEWS_RETENTION_BATCH_SIZE)
+        result["total_seconds"] = round(time.monotonic() - started, 3)
+
+        if result["deleted"]:
+            refresh_dashboard_sections()
+
+    print(f"📊 Retention: removed={result['deleted']} batches={result['batches']} seconds={result['total_seconds']}")
+    return result
+
+
+if __name__ == "__main__":
+    run_news_retention()
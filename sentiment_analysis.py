@@ -1,22 +1,19 @@
-import openai
-import os
 from dotenv import load_dotenv
 from datetime import datetime
 from zoneinfo import ZoneInfo
-import tiktoken
+from config import Config
+import time
+from llm import complete, complete_many, count_tokens
+from llm_scheduler import PRIORITY_CRITICAL, PRIORITY_BACKGROUND
+from prompt_builder import cluster_headlines, fit_to_budget, dedupe_headlines, select_articles
 
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
 
-client = openai.OpenAI(api_key=api_key)
+DAILY_RECAP_SYSTEM_PROMPT = "You are a financial analyst providing market summaries."
 
-# Function to analyze daily sentiment
-def analyze_daily_sentiment_gpt(headlines, indices, sector_summary): 
-    if not headlines:
-        return "No headlines available for analysis."
-
-    market_analysis_text = headlines
 
+def market_clock():
+    """Formatted New York time and whether the market is open."""
     now = datetime.now(ZoneInfo("America/New_York"))
     formatted_time = now.strftime("%A, %B %d, %Y - %I:%M %p %Z")
 
@@ -27,13 +24,14 @@ def analyze_daily_sentiment_gpt(headlines, indices, sector_summary):
         market_status = "Market is closed (After Hours)"
     else:
         market_status = "Market is open"
+    return formatted_time, market_status
 
-    print(headlines)
+
+def build_daily_recap_prompt(market_analysis_text, indices, sector_summary):
+    formatted_time, market_status = market_clock()
     print(formatted_time)
     print(market_status)
 
-    tokenizer = tiktoken.get_encoding("cl100k_base")
-
     prompt = f"""
     **Date & Time:** {formatted_time}  
     **Market Status:** {market_status}  
@@ -91,50 +89,126 @@ def analyze_daily_sentiment_gpt(headlines, indices, sector_summary):
     ### Conclusion:
     End with 2–3 **sharp takeaways** or forward-looking thoughts. Avoid fluff or summaries. Think like a strategist: what should readers watch next, or consider doing?
     """
+    return prompt
+
+
+# Function to analyze daily sentiment
+def analyze_daily_sentiment_gpt(headlines, indices, sector_summary): 
+    if not headlines:
+        return "No headlines available for analysis."
+
+    # Callers pass budgeted sections (prompt_builder); cut again here so no caller can blow the budget
+    market_analysis_text = fit_to_budget(headlines, Config.PROMPT_HEADLINE_TOKENS)
+    indices = fit_to_budget(indices, Config.PROMPT_SECTION_TOKENS)
+    sector_summary = fit_to_budget(sector_summary, Config.PROMPT_SECTION_TOKENS)
+
+    print(headlines)
+    prompt = build_daily_recap_prompt(market_analysis_text, indices, sector_summary)
 
     print(prompt)
-    tokens = tokenizer.encode(prompt)
-    num_tokens = len(tokens)
-    print(f"Number of tokens: {num_tokens}")
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are a financial analyst providing market summaries."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
-
-    except openai.RateLimitError:
-        print("GPT-4 quota exceeded. Switching to GPT-3.5-turbo...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a financial analyst providing market summaries."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
+    print(f"Number of tokens: {count_tokens(prompt)}")
+
+    messages = [
+        {"role": "system", "content": DAILY_RECAP_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+    recap = complete(messages, Config.RECAP_MODEL, max_tokens=Config.RECAP_MAX_TOKENS,
+                     priority=PRIORITY_CRITICAL, job="daily_recap")
+    if not recap:
+        print(f"{Config.RECAP_MODEL} failed. Switching to {Config.RECAP_FALLBACK_MODEL}...")
+        recap = complete(messages, Config.RECAP_FALLBACK_MODEL, max_tokens=Config.RECAP_MAX_TOKENS,
+                         priority=PRIORITY_CRITICAL, job="daily_recap")
+    if not recap:
+        print("❌ Daily recap failed on every model.")
+    return recap or None
+
+def build_cluster_digest_prompt(theme, entries):
+    joined = "\n\n".join(entries)
+    return f"""
+    Below are today's market headlines about **{theme}**. Condense them into 3–5 bullet points for a
+    market strategist who will write the daily recap from several of these digests.
+
+    - Keep every concrete fact: tickers, % moves, numbers, data releases, dates.
+    - Merge stories that report the same event; note when sources disagree.
+    - No opinions or forecasts beyond what the headlines state.
+
+    Headlines:
+    {joined}
+    """
 
-# Function to analyze weekly sentiment
-def analyze_weekly_sentiment_gpt(weekend_headlines, weekly_data):
-    if not weekend_headlines:
+
+async def digest_headline_clusters(clusters):
+    """Map step: each theme's headlines condensed by RECAP_CLUSTER_MODEL, RECAP_CONCURRENCY at a time."""
+    requests = {
+        theme: [
+            {"role": "system", "content": DAILY_RECAP_SYSTEM_PROMPT},
+            {"role": "user", "content": build_cluster_digest_prompt(
+                theme, select_articles(articles, Config.RECAP_CLUSTER_TOKENS))},
+        ]
+        for theme, articles in clusters.items()
+    }
+    return await complete_many(requests, model=Config.RECAP_CLUSTER_MODEL, concurrency=Config.RECAP_CONCURRENCY,
+                               max_tokens=Config.RECAP_DIGEST_MAX_TOKENS, priority=PRIORITY_CRITICAL,
+                               job="daily_recap_themes")
+
+
+async def analyze_daily_sentiment_map_reduce(articles, indices, sector_summary):
+    """
+    Hierarchical daily recap: headlines clustered by theme, each cluster digested in parallel by a cheap
+    model, then the usual structured recap written by RECAP_MODEL from the digests instead of the raw
+    headlines. Themes whose digest failed fall back to their raw (budgeted) headlines; a failed final
+    call falls back to RECAP_FALLBACK_MODEL. Returns None if that fails too.
+    """
+    if not articles:
         return "No headlines available for analysis."
 
-    # Extract market summaries from weekly data (excluding headlines and other data)
-    market_summaries = []
-    for data in weekly_data:
-        if isinstance(data, dict) and "market_summary" in data:
-            market_summaries.append(data["market_summary"])
+    started = time.monotonic()
+    clusters = cluster_headlines(articles)
+    print(f"🗂️ Clustered {len(articles)} headlines into {len(clusters)} themes: "
+          f"{', '.join(f'{theme} ({len(items)})' for theme, items in clusters.items())}.")
+
+    digests = await digest_headline_clusters(clusters)
+    map_seconds = time.monotonic() - started
+
+    sections = []
+    for theme, articles_in_theme in clusters.items():
+        body = digests.get(theme) or "\n".join(select_articles(articles_in_theme, Config.RECAP_CLUSTER_TOKENS // 4))
+        sections.append(f"#### {theme}\n{body}")
+    market_analysis_text = fit_to_budget("\n\n".join(sections), Config.PROMPT_HEADLINE_TOKENS)
+
+    prompt = build_daily_recap_prompt(market_analysis_text,
+                                      fit_to_budget(indices, Config.PROMPT_SECTION_TOKENS),
+                                      fit_to_budget(sector_summary, Config.PROMPT_SECTION_TOKENS))
+    print(f"Number of tokens: {count_tokens(prompt)}")
+    messages = [
+        {"role": "system", "content": DAILY_RECAP_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+    recap = None
+    for model in (Config.RECAP_MODEL, Config.RECAP_FALLBACK_MODEL):
+        recap = (await complete_many({"recap": messages}, model=model, max_tokens=Config.RECAP_MAX_TOKENS,
+                                     priority=PRIORITY_CRITICAL, job="daily_recap")).get("recap")
+        if recap:
+            break
+        print(f"⚠️ Daily recap failed on {model}.")
+
+    print(f"🧾 Daily recap in {time.monotonic() - started:.1f}s (map {map_seconds:.1f}s over {len(clusters)} themes, "
+          f"reduce {time.monotonic() - started - map_seconds:.1f}s).")
+    if not recap:
+        print("❌ Daily recap failed on every model.")
+    return recap or None
+
+# Function to analyze weekly sentiment
+def analyze_weekly_sentiment_gpt(weekend_headlines, weekly_digest_text):
+    """Weekly report from the week's stored daily digests (market_digest.py) plus this weekend's headlines."""
+    if not weekly_digest_text:
+        return "No daily digests available for analysis."
 
     # Combine weekend headlines with weekly data
-    market_analysis_text = "\n".join(weekend_headlines)
+    market_analysis_text = "\n".join(dedupe_headlines(weekend_headlines)) or "No weekend headlines available."
 
-    weekly_data_text = "\n".join(market_summaries)  # Only use market summaries
+    weekly_data_text = fit_to_budget(weekly_digest_text, Config.PROMPT_WEEKLY_TOKENS)
 
     now = datetime.now(ZoneInfo("America/New_York"))
     formatted_time = now.strftime("%A, %B %d, %Y - %I:%M %p %Z")
@@ -146,7 +220,7 @@ def analyze_weekly_sentiment_gpt(weekend_headlines, weekly_data):
     **Date & Time:** {formatted_time}  
     **Market Status:** {market_status}  
 
-    Below are stock market summaries from the past week. There are also stock news headlines from this weekend. Provide a **weekly market summary** that synthesizes key movements, trends, and themes observed during the past week. Focus on identifying **major catalysts** and **emerging patterns** that investors should be aware of, with **actionable insights**.
+    Below are digests of each trading day from the past week. There are also stock news headlines from this weekend. Provide a **weekly market summary** that synthesizes key movements, trends, and themes observed during the past week. Focus on identifying **major catalysts** and **emerging patterns** that investors should be aware of, with **actionable insights**.
 
     - **Prioritize consequential headlines**: Identify the headlines with the most significant **market impact**. Focus on high-impact events such as rate decisions, key economic data (CPI, jobs reports), major earnings surprises, or geopolitical events. 
     - **Consider both stock performance data and headlines** when assessing overall market sentiment. The stock data, including sector and index performance, provides valuable insights into broader market trends.
@@ -195,25 +269,14 @@ def analyze_weekly_sentiment_gpt(weekend_headlines, weekly_data):
         - **Is now a good time to buy, hold, or sell?**
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a financial analyst providing market summaries."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
-    
-    except openai.RateLimitError:
-        print("GPT-4 quota exceeded. Switching to GPT-3.5-turbo...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a financial analyst providing market summaries."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
+    messages = [
+        {"role": "system", "content": DAILY_RECAP_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+    report = complete(messages, "gpt-4", max_tokens=Config.RECAP_MAX_TOKENS, priority=PRIORITY_BACKGROUND,
+                      job="weekly_report")
+    if not report:
+        print("GPT-4 failed. Switching to GPT-3.5-turbo...")
+        report = complete(messages, "gpt-3.5-turbo", max_tokens=Config.RECAP_MAX_TOKENS,
+                          priority=PRIORITY_BACKGROUND, job="weekly_report")
+    return report or "Weekly report unavailable."
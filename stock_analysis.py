@@ -15,6 +15,9 @@ from daily_data import (
 )
 from webapp import create_app, db
 from strategy_sentiment_map import strategy_sentiment_map
+from stock_history import record_daily_history
+from webapp.dashboard import refresh_dashboard_sections
+from webapp.live import publish_live_event
 
 
 def get_prequalified_stocks(snapshot, min_price=2000, min_volume=10_000_000, min_change_pct=-2, min_market_cap=100_000_000_000, min_prev_volume=20_000_000, min_volatility=0.01):
@@ -36,6 +39,7 @@ def get_prequalified_stocks(snapshot, min_price=2000, min_volume=10_000_000, min
             market_cap = stock.get('market_cap')
             high = stock['day']['h']
             low = stock['day']['l']
+            open_price = stock['day'].get('o')
 
             # 💵 Price filter
             if price < min_price:
@@ -62,7 +66,10 @@ def get_prequalified_stocks(snapshot, min_price=2000, min_volume=10_000_000, min
                 "price": price,
                 "volume": volume,
                 "change_pct": change_pct,
-                "market_cap": market_cap
+                "market_cap": market_cap,
+                "open": open_price,
+                "high": high,
+                "low": low
             })
 
         except Exception as e:
@@ -107,7 +114,12 @@ def run_technical_analysis(prequalified_stocks, max_workers=10):
                 "histogram": histogram,
                 "rvol": rvol,
                 "support": support,
-                "resistance": resistance
+                "resistance": resistance,
+                "volume": stock.get("volume"),
+                "change_pct": stock.get("change_pct"),
+                "open": stock.get("open"),
+                "high": stock.get("high"),
+                "low": stock.get("low")
             }
 
             # 🔍 Print technicals for visibility
@@ -417,8 +429,6 @@ def score_strategy_matches(tech_snapshots):
             stock["strategy_label"] = label_strategy_combo(matches)
             stock["sentiment"] = determine_sentiment(stock["strategy_label"], matches)
             scored.append(stock)
-            
-            scored.append(stock)
     print(f"🧠 Scored {len(scored)} stocks with at least 1 matching strategy.")
     return scored
 
@@ -426,43 +436,40 @@ def store_scored_setups(scored_stocks):
     """
     Saves scored stocks and strategy matches into StockData.
     Updates existing records or inserts new ones.
-    Tracks consecutive days stocks appear in the strategy list.
+    Streaks (days_in_a_row) come from one gaps-and-islands query over stock_daily_history,
+    so record_daily_history() must run for today before this.
     """
     from webapp import db
     from webapp.models import StockData  # ✅ Add this!
     from stock_analysis import label_strategy_combo  # Make sure it's imported correctly
-    from datetime import datetime, timedelta
+    from stock_history import get_strategy_streaks, record_confidence_scores
+    from webapp.tickers import ticker_name
+    from datetime import datetime
 
-    today_symbols = set()
-    today = datetime.utcnow().date()
+    today_symbols = {stock["symbol"] for stock in scored_stocks}
+
+    # ✅ One query for all existing rows and one for all streaks (no per-symbol SELECTs)
+    existing_by_symbol = {
+        row.symbol: row for row in StockData.query.filter(StockData.symbol.in_(today_symbols)).all()
+    }
+    streaks = get_strategy_streaks(today_symbols)
 
     for stock in scored_stocks:
         try:
             symbol = stock["symbol"]
-            today_symbols.add(symbol)
-            existing = StockData.query.filter_by(symbol=symbol).first()
+            existing = existing_by_symbol.get(symbol)
 
             tags_list = stock.get("strategy_tags", [])
             tags_str = ",".join(tags_list)
             score = stock.get("strategy_score", 0)
             label = label_strategy_combo(tags_list)
+            stock["days_in_a_row"] = streaks.get(symbol, 1)
+            stock["strategy_label"] = label
             confidence = calculate_confidence_score(stock)
+            stock["confidence_score"] = confidence  # ✅ Carried into stock_daily_history
 
             if existing:
-                # ✅ Track consecutive days
-                last_seen = existing.last_updated.date() if existing.last_updated else None
-
-                if existing.strategy_tags:
-                    if last_seen == today:
-                        # Already updated today – do not increment again
-                        pass
-                    elif last_seen == today - timedelta(days=1):
-                        existing.days_in_a_row = (existing.days_in_a_row or 1) + 1
-                    else:
-                        existing.days_in_a_row = 1
-                else:
-                    existing.days_in_a_row = 1
-
+                existing.days_in_a_row = stock["days_in_a_row"]
                 existing.sentiment = stock.get("sentiment")  # in the update block
                 existing.confidence_score = confidence
                 existing.strategy_tags = tags_str
@@ -475,7 +482,7 @@ def store_scored_setups(scored_stocks):
                     sentiment=stock.get("sentiment"),
                     confidence_score=confidence,
                     symbol=symbol,
-                    name="Unknown",  # Replace if you fetch company name later
+                    name=ticker_name(symbol) or "Unknown",
                     price=stock["price"],
                     change_percent=0.0,
                     change_amount=0.0,
@@ -485,14 +492,17 @@ def store_scored_setups(scored_stocks):
                     strategy_tags=tags_str,
                     strategy_score=score,
                     strategy_label=label,
-                    days_in_a_row=1
+                    days_in_a_row=stock["days_in_a_row"]
                 )
                 db.session.add(new_entry)
+                existing_by_symbol[symbol] = new_entry
 
         except Exception as e:
             print(f"⚠️ Could not store {stock.get('symbol', 'UNKNOWN')}: {e}")
             continue
 
+    record_confidence_scores(scored_stocks)
+
     try:
         # ✅ Phase 3 cleanup: delete previous strategy stocks not in today's list
         from webapp.models import StockData, StockNews  # Ensure import if not already
@@ -733,9 +743,21 @@ if __name__ == "__main__":
         # 🧠 Score everything
         scored_stocks = score_strategy_matches(tech_snapshots)
 
+        # 🗃️ Append today's row for every analyzed stock (hits and misses); streaks are computed from it
+        record_daily_history(tech_snapshots)
+
         # 💾 Store to DB with tracking & cleanup
         print("💾 Storing to DB...")
         store_scored_setups(scored_stocks)
+        refresh_dashboard_sections()
+
+        # 📣 Setups that started today go out live to open dashboards
+        new_hits = [
+            {key: stock.get(key) for key in ("symbol", "price", "strategy_label", "confidence_score", "sentiment")}
+            for stock in scored_stocks if stock.get("days_in_a_row") == 1
+        ]
+        if new_hits:
+            publish_live_event("strategy", new_hits)
 
         # 🔎 Individual Strategy Results
         strategy_sections = [
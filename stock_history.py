@@ -0,0 +1,230 @@
+from datetime import datetime, date
+from collections import defaultdict
+import pytz
+from sqlalchemy import func, text, update, bindparam
+from webapp.models import db, StockDailyHistory
+from webapp.bulk import upsert_rows
+
+
+# Bit positions are part of the stored format: append new tags, never reorder.
+STRATEGY_TAG_BITS = {
+    "breakout": 1 << 0,
+    "breakdown": 1 << 1,
+    "momentum": 1 << 2,
+    "pullback": 1 << 3,
+    "reversal": 1 << 4,
+    "fade": 1 << 5,
+    "slingshot": 1 << 6,
+    "consolidation": 1 << 7,
+    "parabolic": 1 << 8,
+}
+
+
+def encode_strategy_tags(tags):
+    """Packs a list of strategy tags into an integer bitmask. Unknown tags are ignored."""
+    mask = 0
+    for tag in tags or []:
+        mask |= STRATEGY_TAG_BITS.get(tag, 0)
+    return mask
+
+
+def decode_strategy_tags(mask):
+    """Unpacks a bitmask back into the list of strategy tags."""
+    return [tag for tag, bit in STRATEGY_TAG_BITS.items() if mask and mask & bit]
+
+
+def current_trading_date():
+    """Today's date in US/Eastern, which is the date the market session belongs to."""
+    return datetime.now(pytz.timezone("US/Eastern")).date()
+
+
+def _month_start(day, offset=0):
+    month_index = day.year * 12 + (day.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_history_partitions(trading_date=None, months_ahead=1):
+    """
+    Creates the monthly partitions of stock_daily_history that the next writes need.
+    No-op on SQLite or when the table was created unpartitioned (e.g. via db.create_all()).
+    """
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+
+    is_partitioned = db.session.execute(text("""
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = 'stock_daily_history'
+    """)).first()
+    if not is_partitioned:
+        return
+
+    trading_date = trading_date or current_trading_date()
+    for offset in range(0, months_ahead + 1):
+        start = _month_start(trading_date, offset)
+        end = _month_start(trading_date, offset + 1)
+        partition = f"stock_daily_history_y{start.year}m{start.month:02d}"
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF stock_daily_history "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+
+def record_daily_history(tech_snapshots, trading_date=None):
+    """
+    Appends today's row for every analyzed stock to stock_daily_history with multi-row inserts.
+    Reruns on the same trading day overwrite that day's row instead of duplicating it.
+    """
+    trading_date = trading_date or current_trading_date()
+
+    rows = {}
+    for stock in tech_snapshots:
+        symbol = stock.get("symbol")
+        if not symbol or stock.get("price") is None:
+            continue
+        rows[symbol] = {
+            "symbol": symbol,
+            "trading_date": trading_date,
+            "open": stock.get("open"),
+            "high": stock.get("high"),
+            "low": stock.get("low"),
+            "close": stock["price"],
+            "volume": stock.get("volume"),
+            "change_percent": stock.get("change_pct"),
+            "rsi": stock.get("rsi"),
+            "macd": stock.get("macd"),
+            "macd_signal": stock.get("signal"),
+            "macd_histogram": stock.get("histogram"),
+            "rvol": stock.get("rvol"),
+            "support": stock.get("support"),
+            "resistance": stock.get("resistance"),
+            "tags_mask": encode_strategy_tags(stock.get("strategy_tags")),
+            "strategy_label": stock.get("strategy_label"),
+            "confidence_score": stock.get("confidence_score"),
+            "recorded_at": datetime.utcnow(),
+        }
+
+    ensure_history_partitions(trading_date)
+    written = upsert_rows(StockDailyHistory, list(rows.values()), index_elements=["symbol", "trading_date"])
+    db.session.commit()
+
+    print(f"🗃️ Recorded {written} rows in stock_daily_history for {trading_date}.")
+    return written
+
+
+def get_price_history(symbols, days=20):
+    """
+    Returns {symbol: [close, ...]} for the last `days` trading days per symbol, oldest first.
+    One windowed query regardless of how many symbols are requested (dashboard sparklines).
+    """
+    if not symbols:
+        return {}
+
+    ranked = db.session.query(
+        StockDailyHistory.symbol,
+        StockDailyHistory.trading_date,
+        StockDailyHistory.close,
+        func.row_number().over(
+            partition_by=StockDailyHistory.symbol,
+            order_by=StockDailyHistory.trading_date.desc()
+        ).label("rn")
+    ).filter(StockDailyHistory.symbol.in_(symbols)).subquery()
+
+    rows = db.session.query(ranked.c.symbol, ranked.c.close)\
+        .filter(ranked.c.rn <= days)\
+        .order_by(ranked.c.symbol, ranked.c.trading_date)\
+        .all()
+
+    history = defaultdict(list)
+    for symbol, close in rows:
+        history[symbol].append(close)
+    return dict(history)
+
+
+def get_price_trends(symbols, days=5):
+    """
+    Returns {symbol: percent change over the last `days` trading days} using window functions.
+    """
+    if not symbols:
+        return {}
+
+    windowed = db.session.query(
+        StockDailyHistory.symbol,
+        StockDailyHistory.close,
+        func.first_value(StockDailyHistory.close).over(
+            partition_by=StockDailyHistory.symbol,
+            order_by=StockDailyHistory.trading_date.desc()
+        ).label("latest_close"),
+        func.row_number().over(
+            partition_by=StockDailyHistory.symbol,
+            order_by=StockDailyHistory.trading_date.desc()
+        ).label("rn")
+    ).filter(StockDailyHistory.symbol.in_(symbols)).subquery()
+
+    rows = db.session.query(windowed.c.symbol, windowed.c.close, windowed.c.latest_close)\
+        .filter(windowed.c.rn == days + 1)\
+        .all()
+
+    return {
+        symbol: round((latest - base) / base * 100, 2)
+        for symbol, base, latest in rows
+        if base
+    }
+
+
+def get_strategy_streaks(symbols=None, as_of=None):
+    """
+    Returns {symbol: consecutive trading days with at least one strategy hit, ending on the latest trading day}.
+    Trading days are the dates stock_daily_history has rows for, so weekends and holidays don't break a
+    streak and a same-day rerun doesn't extend it. One gaps-and-islands query for the whole universe.
+    """
+    H = StockDailyHistory
+    as_of = as_of or current_trading_date()
+
+    indexed = db.session.query(
+        H.symbol,
+        H.tags_mask,
+        func.dense_rank().over(order_by=H.trading_date).label("day_idx")
+    ).filter(H.trading_date <= as_of).subquery()
+
+    hits = db.session.query(
+        indexed.c.symbol,
+        indexed.c.day_idx,
+        (indexed.c.day_idx - func.row_number().over(
+            partition_by=indexed.c.symbol,
+            order_by=indexed.c.day_idx
+        )).label("island")
+    ).filter(indexed.c.tags_mask > 0).subquery()
+
+    islands = db.session.query(
+        hits.c.symbol,
+        func.count().label("streak"),
+        func.max(hits.c.day_idx).label("last_idx")
+    ).group_by(hits.c.symbol, hits.c.island).subquery()
+
+    latest_idx = db.session.query(func.count(func.distinct(H.trading_date)))\
+        .filter(H.trading_date <= as_of)\
+        .scalar_subquery()
+
+    query = db.session.query(islands.c.symbol, islands.c.streak).filter(islands.c.last_idx == latest_idx)
+    if symbols is not None:
+        query = query.filter(islands.c.symbol.in_(list(symbols)))
+
+    return {symbol: streak for symbol, streak in query.all()}
+
+
+def record_confidence_scores(scored_stocks, trading_date=None):
+    """Writes confidence scores onto today's history rows with one executemany UPDATE."""
+    trading_date = trading_date or current_trading_date()
+    rows = [
+        {"b_symbol": stock["symbol"], "b_trading_date": trading_date, "b_confidence": stock.get("confidence_score")}
+        for stock in {stock["symbol"]: stock for stock in scored_stocks}.values()
+    ]
+    if not rows:
+        return
+
+    table = StockDailyHistory.__table__
+    stmt = update(table)\
+        .where(table.c.symbol == bindparam("b_symbol"), table.c.trading_date == bindparam("b_trading_date"))\
+        .values(confidence_score=bindparam("b_confidence"))
+    db.session.connection().execute(stmt, rows)
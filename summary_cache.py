@@ -0,0 +1,119 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from config import Config
+from webapp import db
+from webapp.models import SummaryCache
+from webapp.bulk import upsert_rows
+
+
+def change_bucket(change_percent):
+    """Daily % change rounded down to SUMMARY_CHANGE_BUCKET-wide buckets (1% by default)."""
+    if change_percent is None:
+        return "na"
+    return int(change_percent // Config.SUMMARY_CHANGE_BUCKET)
+
+
+def rsi_regime(rsi):
+    if rsi is None:
+        return "na"
+    if rsi < 30:
+        return "oversold"
+    if rsi < 45:
+        return "weak"
+    if rsi <= 55:
+        return "neutral"
+    if rsi <= 70:
+        return "strong"
+    return "overbought"
+
+
+def macd_regime(macd, signal, histogram):
+    if macd is None or signal is None:
+        return "na"
+    cross = "bull" if (histogram if histogram is not None else macd - signal) >= 0 else "bear"
+    return f"{cross}-{'above' if macd >= 0 else 'below'}-zero"
+
+
+def level_proximity(price, support, resistance):
+    """Where price sits against support/resistance; 'near' means within SUMMARY_LEVEL_PROXIMITY_PCT."""
+    if price is None or support is None or resistance is None:
+        return "na"
+    low, high = min(support, resistance), max(support, resistance)
+    band = Config.SUMMARY_LEVEL_PROXIMITY_PCT / 100
+    if price < low:
+        return "below-support"
+    if price > high:
+        return "above-resistance"
+    if price <= low * (1 + band):
+        return "near-support"
+    if price >= high * (1 - band):
+        return "near-resistance"
+    return "mid-range"
+
+
+def build_fingerprint(symbol, stock_entry, indicators, news_ids):
+    """
+    Hash of what would materially change a summary: bucketed price change, RSI and MACD regimes,
+    support/resistance proximity and the set of articles the prompt would include.
+    """
+    features = {
+        "symbol": symbol,
+        "change": change_bucket(stock_entry.change_percent),
+        "rsi": rsi_regime(indicators.get("rsi")),
+        "macd": macd_regime(indicators.get("macd"), indicators.get("signal"), indicators.get("histogram")),
+        "levels": level_proximity(stock_entry.price, indicators.get("support"), indicators.get("resistance")),
+        "news": sorted(news_ids),
+    }
+    return hashlib.sha256(json.dumps(features, sort_keys=True).encode()).hexdigest()
+
+
+def load_cached_summaries(fingerprints):
+    """Cached summaries younger than SUMMARY_MAX_AGE_HOURS for the given fingerprints, in one query."""
+    if not fingerprints:
+        return {}
+    cutoff = datetime.utcnow() - timedelta(hours=Config.SUMMARY_MAX_AGE_HOURS)
+    rows = SummaryCache.query.filter(
+        SummaryCache.fingerprint.in_(list(fingerprints)),
+        SummaryCache.created_at >= cutoff
+    ).all()
+    return {row.fingerprint: row for row in rows}
+
+
+def store_summaries(rows):
+    """Upserts {fingerprint, symbol, summary_text, summary_html, summary_html_no_headings, tokens} rows. Does not commit."""
+    now = datetime.utcnow()
+    return upsert_rows(SummaryCache, [dict(row, created_at=now) for row in rows], ["fingerprint"])
+
+
+def prune_summary_cache():
+    """Drops entries too old to be reused."""
+    cutoff = datetime.utcnow() - timedelta(hours=Config.SUMMARY_MAX_AGE_HOURS)
+    deleted = SummaryCache.query.filter(SummaryCache.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        print(f"🧹 Pruned {deleted} expired summary cache entries.")
+    return deleted
+
+
+class SummaryRunStats:
+    """Counts how each stale symbol was handled in one run, and the LLM tokens that were not spent."""
+
+    def __init__(self):
+        self.unchanged = 0
+        self.cache_hits = 0
+        self.generated = 0
+        self.tokens_avoided = 0
+
+    def skip_unchanged(self, tokens):
+        self.unchanged += 1
+        self.tokens_avoided += tokens
+
+    def reuse_cached(self, tokens):
+        self.cache_hits += 1
+        self.tokens_avoided += tokens
+
+    def report(self):
+        avoided = self.unchanged + self.cache_hits
+        print(f"♻️ Summary fingerprints: {self.generated} summaries sent to the LLM, {avoided} avoided "
+              f"({self.unchanged} unchanged, {self.cache_hits} cache hits), ~{self.tokens_avoided:,} tokens saved.")
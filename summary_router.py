@@ -0,0 +1,90 @@
+from collections import Counter, defaultdict
+from config import Config
+from summary_cache import rsi_regime, level_proximity
+
+QUIET = "quiet"
+NORMAL = "normal"
+EVENTFUL = "eventful"
+
+
+def tier_models():
+    """The model each LLM tier is summarized with; quiet symbols get a template instead."""
+    return {NORMAL: Config.SUMMARY_MODEL_NORMAL, EVENTFUL: Config.SUMMARY_MODEL_EVENTFUL}
+
+
+def classify_symbol(stock_entry, indicators, news_articles):
+    """
+    Sorts a symbol's day into quiet / normal / eventful from the same inputs the prompt is built from,
+    before any LLM call:
+    - eventful: a big move, heavy relative volume, extreme RSI, a break through support/resistance
+      or a high-ranked article,
+    - quiet: a small move on ordinary volume, neutral RSI, price mid-range and no news,
+    - normal: everything in between.
+    """
+    change = abs(stock_entry.change_percent or 0.0)
+    rvol = indicators.get("rvol")
+    rsi = rsi_regime(indicators.get("rsi"))
+    levels = level_proximity(stock_entry.price, indicators.get("support"), indicators.get("resistance"))
+    top_rankscore = max((article.rankscore or 0.0 for article in news_articles), default=0.0)
+
+    if (change >= Config.SUMMARY_EVENTFUL_CHANGE_PCT
+            or (rvol is not None and rvol >= Config.SUMMARY_EVENTFUL_RVOL)
+            or rsi in ("oversold", "overbought")
+            or levels in ("below-support", "above-resistance")
+            or top_rankscore >= Config.SUMMARY_EVENTFUL_RANKSCORE):
+        return EVENTFUL
+
+    if (change < Config.SUMMARY_QUIET_CHANGE_PCT
+            and (rvol is None or rvol < Config.SUMMARY_QUIET_RVOL)
+            and rsi in ("neutral", "na")
+            and levels in ("mid-range", "na")
+            and not news_articles):
+        return QUIET
+
+    return NORMAL
+
+
+def _price(value):
+    return f"${value:,.2f}" if value is not None else "n/a"
+
+
+def templated_summary(symbol, stock_entry, indicators):
+    """
+    The deterministic summary for a quiet symbol, in the shape the prompt asks the model for on quiet days.
+    Volume and support/resistance are only mentioned when the indicators for them are known.
+    """
+    rsi = indicators.get("rsi")
+    support, resistance = indicators.get("support"), indicators.get("resistance")
+    volume_text = " on ordinary volume" if indicators.get("rvol") is not None else ""
+    momentum = f"RSI is neutral at {rsi:.0f}" if rsi is not None else "Momentum is flat"
+    if support is not None and resistance is not None:
+        momentum += (f", and price sits mid-range between support near {_price(support)} "
+                     f"and resistance near {_price(resistance)}")
+    return (
+        f"**{symbol}** traded quietly today, {stock_entry.change_percent or 0.0:+.2f}% at {_price(stock_entry.price)}"
+        f"{volume_text} with no notable news. {momentum}.\n\n"
+        f"> {symbol} showed no meaningful changes today. No actionable signal."
+    )
+
+
+class RoutingStats:
+    """How many symbols each tier handled and how long each model's calls took in one run."""
+
+    def __init__(self):
+        self.tiers = Counter()
+        self.models = Counter()
+        self.latency = defaultdict(float)
+
+    def route(self, tier, model=None):
+        self.tiers[tier] += 1
+        self.models[model or "template"] += 1
+
+    def timed(self, model, seconds):
+        self.latency[model] += seconds
+
+    def report(self, total_seconds):
+        mix = ", ".join(f"{count} {model}" for model, count in self.models.most_common()) or "none"
+        latency = ", ".join(f"{model} {seconds:.1f}s" for model, seconds in self.latency.items()) or "no LLM calls"
+        print(f"🧭 Summary routing: {self.tiers[QUIET]} quiet, {self.tiers[NORMAL]} normal, "
+              f"{self.tiers[EVENTFUL]} eventful. Model mix: {mix}. LLM time: {latency}; "
+              f"{total_seconds:.1f}s total.")
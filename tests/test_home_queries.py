@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta
+import pytest
+from config import Config
+from webapp import create_app, db
+from webapp.dashboard import refresh_dashboard_sections
+from webapp.models import User, UserSavedStock, StockData, StockNews, StockDailyHistory
+from webapp.sql_stats import count_statements
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'home.db'}")
+    # Nothing listens on port 1: the fragment and user caches fall back to the database
+    monkeypatch.setattr(Config, "REDIS_URL", "redis://127.0.0.1:1/0")
+    app = create_app()
+    app.config.update(TESTING=True, SECRET_KEY="test")
+    with app.app_context():
+        db.create_all()
+        refresh_dashboard_sections()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def save_stocks(user, symbols):
+    now = datetime.utcnow()
+    for symbol in symbols:
+        db.session.add(UserSavedStock(user_id=user.id, stock_symbol=symbol))
+        db.session.add(StockData(symbol=symbol, name=f"{symbol} Inc", price=10.0, change_percent=1.0,
+                                 change_amount=0.1, volume=1000, category="watchlist", last_updated=now))
+        for i in range(3):
+            db.session.add(StockNews(symbol=symbol, headline=f"{symbol} news {i}", url=f"https://example.com/{symbol}/{i}",
+                                     source="Example", date_published=now - timedelta(hours=i)))
+        for i in range(6):
+            db.session.add(StockDailyHistory(symbol=symbol, trading_date=date(2026, 10, 1) + timedelta(days=i),
+                                             close=10.0 + i, recorded_at=now))
+    db.session.commit()
+
+
+def home_statement_count(client):
+    with count_statements(db.engine) as counter:
+        response = client.get("/home")
+    assert response.status_code == 200
+    return counter.count
+
+
+def test_home_query_count_does_not_grow_with_saved_stocks(app):
+    user = User(email="watcher@example.com", password="x", subscription_status="active")
+    db.session.add(user)
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+        session["_fresh"] = True
+
+    save_stocks(user, ["AAA"])
+    client.get("/home")  # warm-up: first-request setup shouldn't count against either run
+    with_one = home_statement_count(client)
+
+    save_stocks(user, ["BBB", "CCC", "DDD", "EEE"])
+    with_five = home_statement_count(client)
+
+    assert with_one == with_five, f"{with_one} statements with 1 saved stock, {with_five} with 5"
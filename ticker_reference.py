@@ -0,0 +1,110 @@
+import time
+from datetime import datetime
+import requests
+from sqlalchemy import update, or_
+from config import Config
+from polygon_api import get_reference_tickers, get_ticker_market_cap
+from webapp import create_app, db
+from webapp.models import TickerReference, StockData, UserSavedStock
+from webapp.bulk import upsert_rows
+
+app = create_app()
+
+PLACEHOLDER_NAMES = ("Unknown",)
+PLACEHOLDER_SUFFIX = "(No name found)"
+
+
+def backfill_stock_names():
+    """Replaces placeholder StockData names with reference names in one UPDATE ... FROM."""
+    stmt = update(StockData)\
+        .where(StockData.symbol == TickerReference.symbol)\
+        .where(TickerReference.name.isnot(None))\
+        .where(or_(StockData.name.in_(PLACEHOLDER_NAMES), StockData.name.like(f"%{PLACEHOLDER_SUFFIX}")))\
+        .values(name=TickerReference.name)\
+        .execution_options(synchronize_session=False)
+    return db.session.execute(stmt).rowcount
+
+
+def refresh_market_caps():
+    """
+    Fills ticker_reference.market_cap for the symbols we track (StockData and saved stocks) from
+    Polygon's per-ticker details endpoint, one call each; the bulk list has no market cap.
+    Symbols whose lookup fails keep their previous value.
+    """
+    tracked = {symbol for (symbol,) in db.session.query(StockData.symbol)}
+    tracked |= {symbol for (symbol,) in db.session.query(UserSavedStock.stock_symbol).distinct()}
+    known = {symbol for (symbol,) in db.session.query(TickerReference.symbol)
+             .filter(TickerReference.symbol.in_(tracked))}
+
+    caps = []
+    for symbol in sorted(known):
+        market_cap = get_ticker_market_cap(symbol)
+        if market_cap is not None:
+            caps.append({"symbol": symbol, "market_cap": market_cap})
+    if caps:
+        db.session.execute(update(TickerReference), caps)  # Bulk UPDATE by primary key
+    return len(caps)
+
+
+def refresh_ticker_reference():
+    """
+    Daily job: bulk-loads Polygon's active reference tickers into ticker_reference,
+    drops delisted symbols, backfills placeholder StockData names and refreshes the market caps
+    of tracked symbols.
+    Delisted symbols are only dropped after a complete load that's at least TICKER_PRUNE_MIN_RATIO
+    of the current table, so a bad day at Polygon can't empty the list /save_stock validates against.
+    """
+    with app.app_context():
+        started = time.monotonic()
+        run_started_at = datetime.utcnow()
+
+        try:
+            tickers = get_reference_tickers()
+        except requests.RequestException as e:
+            print(f"❌ Reference ticker load failed, keeping the existing list: {e}")
+            return {"loaded": 0}
+        if not tickers:
+            print("⚠️ No reference tickers returned. Keeping the existing list.")
+            return {"loaded": 0}
+
+        rows = {}
+        for ticker in tickers:
+            symbol = (ticker.get("symbol") or "").upper()
+            if not symbol or len(symbol) > 10:
+                continue
+            rows[symbol] = {
+                "symbol": symbol,
+                "name": (ticker.get("name") or "")[:200] or None,
+                "exchange": ticker.get("exchange"),
+                "type": ticker.get("type"),
+                "updated_at": run_started_at,
+            }
+
+        existing = TickerReference.query.count()
+        loaded = upsert_rows(TickerReference, list(rows.values()), index_elements=["symbol"], batch_size=1000)
+        if len(rows) >= existing * Config.TICKER_PRUNE_MIN_RATIO:
+            removed = TickerReference.query.filter(TickerReference.updated_at < run_started_at)\
+                .delete(synchronize_session=False)
+        else:
+            removed = 0
+            print(f"⚠️ Loaded {len(rows)} tickers against {existing} stored, below "
+                  f"TICKER_PRUNE_MIN_RATIO={Config.TICKER_PRUNE_MIN_RATIO}. Not dropping any.")
+        renamed = backfill_stock_names()
+        db.session.commit()
+        market_caps = refresh_market_caps()
+        db.session.commit()
+
+        result = {
+            "loaded": loaded,
+            "removed": removed,
+            "renamed": renamed,
+            "market_caps": market_caps,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        print(f"🔠 Ticker reference: loaded={loaded} removed={removed} renamed={renamed} "
+              f"market_caps={market_caps} seconds={result['seconds']}")
+        return result
+
+
+if __name__ == "__main__":
+    refresh_ticker_reference()
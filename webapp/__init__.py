@@ -8,11 +8,13 @@ import sendgrid
 from sendgrid.helpers.mail import Mail, Email, To, Content
 import os 
 from flask_mail import Mail
+from .db_routing import RoutingSession
+from .metrics import init_request_metrics
 
 mail = Mail()
 
 # Initialize the extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # Reads in @read_only views may go to the replica
 bcrypt = Bcrypt()
 login_manager = LoginManager()
 migrate = Migrate()  # Initialize Migrate
@@ -34,6 +36,24 @@ def create_app():
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Pool sizes per role: primary (writes + pipeline) and optional read replica (dashboard reads)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith("postgresql"):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            "pool_size": Config.DB_POOL_SIZE,
+            "max_overflow": Config.DB_MAX_OVERFLOW,
+            "pool_pre_ping": True,
+        }
+
+    if Config.DATABASE_REPLICA_URL:
+        app.config['SQLALCHEMY_BINDS'] = {
+            "replica": {
+                "url": Config.DATABASE_REPLICA_URL.replace("postgres://", "postgresql://"),
+                "pool_size": Config.REPLICA_POOL_SIZE,
+                "max_overflow": Config.REPLICA_MAX_OVERFLOW,
+                "pool_pre_ping": True,
+            }
+        }
+
     # Initialize the extensions
     db.init_app(app)
     bcrypt.init_app(app)
@@ -44,15 +64,23 @@ def create_app():
 
     # Import routes and models
     from .routes import routes
-    from .models import User
+    from .api import api
+    from .live import live
+    from .metrics import metrics
+    from .user_cache import load_cached_user
 
     # Register blueprints or routes
     app.register_blueprint(routes)
+    app.register_blueprint(api)
+    app.register_blueprint(live)
+    app.register_blueprint(metrics)
+
+    init_request_metrics(app)
 
-    # User loader for Flask-Login
+    # User loader for Flask-Login (Redis-cached; see webapp/user_cache.py)
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_cached_user(user_id)
     
     # Register custom Jinja filters
     def comma_format(value):
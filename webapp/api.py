@@ -0,0 +1,183 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from flask import Blueprint, Response, jsonify, request
+from flask_login import login_required, current_user
+from sqlalchemy import tuple_
+from config import Config
+from .models import StockNews, UserSavedStock
+from .db_routing import read_only
+from .cache import get_data_version
+from .dashboard import load_dashboard_sections, news_to_dict
+from .loaders import load_stocks_by_symbol, load_latest_news_by_symbol, load_price_history_by_symbol
+from .tickers import ticker_index
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+NEWS_KINDS = ("trending", "stock", "all")
+
+
+def _encode_cursor(published, news_id):
+    raw = f"{published.isoformat()}|{news_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    published, news_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(published), int(news_id)
+
+
+def _page_size():
+    limit = request.args.get("limit", Config.API_PAGE_SIZE, type=int)
+    return max(1, min(limit, Config.API_MAX_PAGE_SIZE))
+
+
+def _not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def conditional_json(name, build):
+    """
+    Serves build() as JSON with a strong ETag.
+    For shared data the ETag comes from the pipeline's data version plus the query string, so a
+    matching If-None-Match returns 304 before any query runs. Without a version (per-user data,
+    Redis down) the ETag is a hash of the body.
+    """
+    version = get_data_version() if name != "watchlist" else None
+
+    if version is not None:
+        args_hash = hashlib.sha1(request.query_string).hexdigest()[:12]
+        etag = f"{name}-v{version}-{args_hash}"
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        response = jsonify(build())
+        response.set_etag(etag)
+    else:
+        payload = build()
+        body = json.dumps(payload, sort_keys=True, default=str)
+        etag = hashlib.sha1(body.encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        response = jsonify(payload)
+        response.set_etag(etag)
+
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@api.route("/news")
+@login_required
+@read_only
+def news():
+    """
+    Newest-first StockNews page. ?kind=trending|stock|all, ?symbol=, ?limit=, ?cursor=<next_cursor>.
+    Keyset pagination on (date_published, id) keeps every page one bounded index scan.
+    """
+    kind = request.args.get("kind", "all")
+    if kind not in NEWS_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(NEWS_KINDS)}"}), 400
+
+    cursor = request.args.get("cursor")
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    limit = _page_size()
+    symbol = request.args.get("symbol", "").upper().strip()
+
+    def build():
+        query = StockNews.query
+        if kind == "trending":
+            query = query.filter(StockNews.rankscore.isnot(None))
+        elif kind == "stock":
+            query = query.filter(StockNews.rankscore.is_(None))
+        if symbol:
+            query = query.filter(StockNews.symbol == symbol)
+        if after:
+            query = query.filter(tuple_(StockNews.date_published, StockNews.id) < tuple_(*after))
+
+        rows = query.order_by(StockNews.date_published.desc(), StockNews.id.desc()).limit(limit + 1).all()
+        page = rows[:limit]
+        next_cursor = _encode_cursor(page[-1].date_published, page[-1].id) if len(rows) > limit else None
+        return {"items": [news_to_dict(article) for article in page], "next_cursor": next_cursor}
+
+    return conditional_json("news", build)
+
+
+@api.route("/strategies")
+@login_required
+@read_only
+def strategies():
+    """Today's strategy setups grouped by label, from the precomputed dashboard sections."""
+    def build():
+        sections = load_dashboard_sections()
+        return {"groups": [{"label": label, "stocks": stocks} for label, stocks in sections["strategy"]]}
+
+    return conditional_json("strategies", build)
+
+
+@api.route("/movers")
+@login_required
+@read_only
+def movers():
+    """Gainers, losers, market ETFs and most active stocks with their latest news."""
+    def build():
+        sections = load_dashboard_sections()
+        return {
+            "gainers": sections["gainers"],
+            "losers": sections["losers"],
+            "market": sections["market_data"],
+            "top_traded": sections["top_traded"],
+            "top_traded_news": sections["top_traded_news"],
+        }
+
+    return conditional_json("movers", build)
+
+
+@api.route("/watchlist")
+@login_required
+@read_only
+def watchlist():
+    """The current user's saved stocks with price data and latest news, in a fixed number of queries."""
+    def build():
+        symbols = [row.stock_symbol for row in UserSavedStock.query.filter_by(user_id=current_user.id).all()]
+        stocks = load_stocks_by_symbol(symbols)
+        latest_news = load_latest_news_by_symbol(symbols, per_symbol=10)
+        history = load_price_history_by_symbol(symbols)
+        return {"stocks": [
+            {
+                "symbol": symbol,
+                "price": stocks[symbol].price,
+                "change_percent": stocks[symbol].change_percent,
+                "volume": stocks[symbol].volume,
+                "summary": stocks[symbol].summary_text,
+                "closes": history[symbol]["closes"],
+                "trend_percent": history[symbol]["trend"],
+                "news": [news_to_dict(article) for article in latest_news.get(symbol, [])],
+            }
+            for symbol in symbols if symbol in stocks
+        ]}
+
+    return conditional_json("watchlist", build)
+
+
+@api.route("/tickers")
+@login_required
+def tickers():
+    """Autocomplete: ?prefix=AA returns matching symbols, then company-name matches, from the in-process index."""
+    prefix = request.args.get("prefix", "").strip()
+    if not prefix:
+        return jsonify({"items": []})
+
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+    response = jsonify({"items": ticker_index.search(prefix, limit=limit)})
+    response.headers["Cache-Control"] = "private, max-age=3600"
+    return response
@@ -0,0 +1,43 @@
+from . import db
+
+
+def _dialect_insert():
+    """Returns the dialect-specific insert() that supports ON CONFLICT."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+    return insert
+
+
+def upsert_rows(model, rows, index_elements, batch_size=500):
+    """
+    Writes rows as multi-row INSERT ... ON CONFLICT DO UPDATE statements, one per batch.
+    Every non-key column present in the rows is overwritten on conflict.
+    Does not commit.
+    """
+    if not rows:
+        return 0
+
+    insert = _dialect_insert()
+    table = model.__table__
+    update_columns = [key for key in rows[0] if key not in index_elements]
+
+    written = 0
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        stmt = insert(table).values(chunk)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in update_columns}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+        db.session.execute(stmt)
+        written += len(chunk)
+
+    return written
@@ -0,0 +1,93 @@
+import json
+import time
+import redis
+from config import Config
+
+DATA_VERSION_KEY = "dashboard:data_version"
+FRAGMENTS_KEY_PREFIX = "dashboard:fragments:v"
+
+# After a connection failure, skip Redis for this many seconds instead of timing out on every request
+RETRY_AFTER_SECONDS = 30
+
+_client = None
+_down_until = 0.0
+
+# Reads the current data version and that version's fragments in a single round trip
+_GET_FRAGMENTS_SCRIPT = """
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('GET', ARGV[1] .. version)}
+"""
+
+
+def get_redis():
+    """Shared Redis client, or None while Redis is marked unavailable."""
+    global _client
+    if time.monotonic() < _down_until:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(
+            Config.REDIS_URL,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+    return _client
+
+
+def _mark_down(error):
+    global _down_until
+    _down_until = time.monotonic() + RETRY_AFTER_SECONDS
+    print(f"⚠️ Redis unavailable, bypassing cache for {RETRY_AFTER_SECONDS}s: {error}")
+
+
+def bump_data_version():
+    """Called by the pipeline after every write the dashboard depends on; orphans all cached fragments."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        version = client.incr(DATA_VERSION_KEY)
+        print(f"🔖 Dashboard data version bumped to {version}.")
+        return version
+    except redis.RedisError as e:
+        _mark_down(e)
+        return None
+
+
+def get_fragments():
+    """
+    Returns (version, {name: html}) for the current data version.
+    Fragments are None on a miss; version is None if Redis is unavailable.
+    """
+    client = get_redis()
+    if client is None:
+        return None, None
+    try:
+        version, payload = client.eval(_GET_FRAGMENTS_SCRIPT, 1, DATA_VERSION_KEY, FRAGMENTS_KEY_PREFIX)
+    except redis.RedisError as e:
+        _mark_down(e)
+        return None, None
+    return version.decode(), json.loads(payload) if payload else None
+
+
+def set_fragments(version, fragments):
+    """Stores rendered fragments under the version they were rendered for. Old versions simply expire."""
+    client = get_redis()
+    if client is None or version is None:
+        return
+    try:
+        client.set(f"{FRAGMENTS_KEY_PREFIX}{version}", json.dumps(fragments), ex=Config.FRAGMENT_CACHE_TTL)
+    except redis.RedisError as e:
+        _mark_down(e)
+
+
+def get_data_version():
+    """Current dashboard data version, or None if Redis is unavailable."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        version = client.get(DATA_VERSION_KEY)
+    except redis.RedisError as e:
+        _mark_down(e)
+        return None
+    return version.decode() if version else "0"
@@ -0,0 +1,166 @@
+from datetime import datetime
+from flask import render_template
+from config import Config
+from . import db
+from .models import StockData, StockNews, DashboardSection
+from .bulk import upsert_rows
+from .loaders import load_latest_news_by_symbol
+from .db_routing import primary_only
+from .cache import bump_data_version, get_fragments, set_fragments
+
+FRAGMENT_TEMPLATES = {
+    "setups": "fragments/home_setups.html",
+    "teaser": "fragments/home_teaser.html",
+}
+
+SECTIONS = (
+    "strategy",
+    "trending_news",
+    "gainers",
+    "losers",
+    "market_data",
+    "top_traded",
+    "top_traded_news",
+)
+
+
+def stock_to_dict(stock):
+    return {
+        "symbol": stock.symbol,
+        "name": stock.name,
+        "price": stock.price,
+        "change_percent": stock.change_percent,
+        "volume": stock.volume,
+        "category": stock.category,
+        "strategy_tags": stock.strategy_tags,
+        "strategy_score": stock.strategy_score,
+        "strategy_label": stock.strategy_label,
+        "days_in_a_row": stock.days_in_a_row,
+        "confidence_score": stock.confidence_score,
+        "sentiment": stock.sentiment,
+    }
+
+
+def news_to_dict(news):
+    return {
+        "id": news.id,
+        "symbol": news.symbol,
+        "headline": news.headline,
+        "description": news.description,
+        "source": news.source,
+        "url": news.url,
+        "rankscore": news.rankscore,
+        "date_published": news.date_published.isoformat() if news.date_published else None,
+    }
+
+
+def build_dashboard_sections():
+    """Runs the shared dashboard queries once and returns JSON-ready payloads keyed by section."""
+    news_limit = Config.DASHBOARD_NEWS_LIMIT
+    today = datetime.utcnow().date()
+
+    strategy_stocks = StockData.query.filter(
+        StockData.category == "strategy",
+        db.func.date(StockData.last_updated) == today
+    ).order_by(StockData.strategy_score.desc()).all()
+
+    # Group by strategy_label, kept as [label, stocks] pairs so order survives JSON storage
+    grouped = {}
+    for stock in strategy_stocks:
+        grouped.setdefault(stock.strategy_label or "Unlabeled", []).append(stock_to_dict(stock))
+
+    trending_news = StockNews.query.filter(StockNews.rankscore.isnot(None))\
+        .order_by(StockNews.rankscore.desc(), StockNews.date_published.desc()).limit(news_limit).all()
+
+    gainers = StockData.query.filter(StockData.category.contains("gainer")).order_by(StockData.change_percent.desc()).limit(5).all()
+    losers = StockData.query.filter(StockData.category.contains("loser")).order_by(StockData.change_percent).limit(5).all()
+    market_data = StockData.query.filter_by(category="market").order_by(StockData.change_percent.desc()).limit(10).all()
+    top_traded = StockData.query.filter(StockData.category.contains("top_traded")).order_by(StockData.volume.desc()).all()
+
+    latest_news = load_latest_news_by_symbol([stock.symbol for stock in top_traded], per_symbol=3, exclude_trending=True)
+    top_traded_news = {
+        stock.symbol: [news_to_dict(news) for news in latest_news.get(stock.symbol, [])]
+        for stock in top_traded
+    }
+
+    return {
+        "strategy": [[label, stocks] for label, stocks in grouped.items()],
+        "trending_news": [news_to_dict(news) for news in trending_news],
+        "gainers": [stock_to_dict(stock) for stock in gainers],
+        "losers": [stock_to_dict(stock) for stock in losers],
+        "market_data": [stock_to_dict(stock) for stock in market_data],
+        "top_traded": [stock_to_dict(stock) for stock in top_traded],
+        "top_traded_news": top_traded_news,
+    }
+
+
+def refresh_dashboard_sections():
+    """
+    Rebuilds every shared dashboard section and swaps them in with one upsert.
+    Readers keep seeing the previous snapshot until the commit.
+    """
+    sections = build_dashboard_sections()
+    refreshed_at = datetime.utcnow()
+
+    upsert_rows(DashboardSection, [
+        {"section": name, "payload": payload, "refreshed_at": refreshed_at}
+        for name, payload in sections.items()
+    ], index_elements=["section"])
+    db.session.commit()
+
+    print(f"🧊 Refreshed {len(sections)} dashboard sections.")
+
+    # New data version: pre-render the shared fragments so the first visitor after a refresh gets a hit
+    version = bump_data_version()
+    if version is not None:
+        set_fragments(version, render_dashboard_fragments(sections))
+    return sections
+
+
+def load_dashboard_sections():
+    """
+    Reads all precomputed sections with a single primary-key SELECT.
+    Falls back to building them live (without storing) if the pipeline hasn't refreshed yet.
+    """
+    sections = {row.section: row.payload for row in DashboardSection.query.all()}
+
+    if any(name not in sections for name in SECTIONS):
+        print("⚠️ Dashboard sections missing. Building live until the pipeline refreshes them.")
+        live = build_dashboard_sections()
+        for name in SECTIONS:
+            sections.setdefault(name, live[name])
+
+    return sections
+
+
+def render_dashboard_fragments(sections):
+    """Renders the HTML that is identical for every user (everything on /home except the watchlist)."""
+    context = {
+        "grouped": dict(sections["strategy"]),
+        "trending_news": sections["trending_news"],
+        "gainers": sections["gainers"],
+        "losers": sections["losers"],
+        "market_data": sections["market_data"],
+        "top_traded": sections["top_traded"],
+        "stock_news_dict": sections["top_traded_news"],
+    }
+    return {name: render_template(template, **context) for name, template in FRAGMENT_TEMPLATES.items()}
+
+
+def get_dashboard_fragments():
+    """
+    Returns the shared /home fragments: one Redis round trip on a hit.
+    On a miss they're rendered from the summary table and cached under the data version read before
+    rendering, so a concurrent pipeline refresh can never leave stale HTML under the new version.
+    """
+    version, fragments = get_fragments()
+    if fragments is not None:
+        return fragments
+
+    # Read from the primary: a lagging replica could still hold data older than `version`
+    with primary_only():
+        sections = load_dashboard_sections()
+
+    fragments = render_dashboard_fragments(sections)
+    set_fragments(version, fragments)
+    return fragments
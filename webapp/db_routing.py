@@ -0,0 +1,87 @@
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+REPLICA_BIND = "replica"
+
+# Per-process replica health, refreshed at most every REPLICA_LAG_CHECK_INTERVAL seconds.
+_lag_lock = threading.Lock()
+_lag_state = {"checked_at": 0.0, "healthy": True, "lag": 0.0}
+
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def read_only(view):
+    """Marks a view as read-only so its queries may be served by the read replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def primary_only():
+    """Sends queries inside the block to the primary even in a @read_only view (e.g. when filling a cache)."""
+    previous = g.get("db_read_only")
+    g.db_read_only = False
+    try:
+        yield
+    finally:
+        g.db_read_only = previous
+
+
+def replica_is_healthy(engine):
+    """Checks replication lag (cached); returns False when the replica is too far behind or unreachable."""
+    interval = current_app.config.get("REPLICA_LAG_CHECK_INTERVAL", 10)
+    max_lag = current_app.config.get("REPLICA_MAX_LAG_SECONDS", 30)
+
+    now = time.monotonic()
+    if now - _lag_state["checked_at"] < interval:
+        return _lag_state["healthy"]
+
+    with _lag_lock:
+        if now - _lag_state["checked_at"] < interval:
+            return _lag_state["healthy"]
+
+        try:
+            if engine.dialect.name == "postgresql":
+                with engine.connect() as conn:
+                    lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+            else:
+                lag = 0.0
+            healthy = lag <= max_lag
+            if not healthy:
+                print(f"⚠️ Replica lag {lag:.1f}s exceeds {max_lag}s. Routing reads to primary.")
+        except Exception as e:
+            lag = None
+            healthy = False
+            print(f"⚠️ Replica lag check failed, routing reads to primary: {e}")
+
+        _lag_state.update(checked_at=now, healthy=healthy, lag=lag)
+        return healthy
+
+
+class RoutingSession(Session):
+    """
+    Sends queries from @read_only request handlers to the 'replica' bind when one is configured.
+    Flushes, worker/pipeline code and every other handler use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get("db_read_only"):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None and replica_is_healthy(replica):
+                return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,42 @@
+from celery import Celery
+from config import Config
+import redis
+from .cache import get_redis
+
+# Producer-only client: tasks are sent by name, so the web app never imports celery_worker / daily_data
+celery_client = Celery("webapp", broker=Config.REDIS_URL)
+celery_client.conf.broker_connection_timeout = 1
+
+SNAPSHOT_STATUS_TTL = 3600
+
+
+def _status_key(user_id, symbol):
+    return f"save_stock:{user_id}:{symbol}"
+
+
+def set_snapshot_status(user_id, symbol, status):
+    """status: 'pending', 'ready' or 'failed'."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.set(_status_key(user_id, symbol), status, ex=SNAPSHOT_STATUS_TTL)
+    except redis.RedisError as e:
+        print(f"⚠️ Could not record snapshot status for {symbol}: {e}")
+
+
+def get_snapshot_status(user_id, symbol):
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        status = client.get(_status_key(user_id, symbol))
+    except redis.RedisError:
+        return None
+    return status.decode() if status else None
+
+
+def enqueue_snapshot_fetch(user_id, symbol):
+    """Queues the Polygon snapshot + news fetch for a new symbol; the worker saves it to the user's list."""
+    set_snapshot_status(user_id, symbol, "pending")  # Before sending, so a fast worker's 'ready' isn't overwritten
+    celery_client.send_task("celery_worker.fetch_snapshot_and_save_stock", args=[user_id, symbol], retry=False)
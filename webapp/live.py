@@ -0,0 +1,141 @@
+import json
+import queue
+import threading
+import time
+import redis
+from flask import Blueprint, Response
+from flask_login import login_required, current_user
+from config import Config
+from . import db
+from .models import UserSavedStock
+from .cache import get_redis
+
+live = Blueprint('live', __name__)
+
+LIVE_CHANNEL = "dashboard:live"
+RESYNC_EVENT = {"type": "resync", "data": {}}
+
+
+def publish_live_event(event_type, data):
+    """
+    Pipeline side: pushes an update to every open dashboard.
+    event_type is 'prices' ({symbol: {...}}), 'strategy' ([hits]) or 'headlines' ([articles]).
+    """
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        receivers = client.publish(LIVE_CHANNEL, json.dumps({"type": event_type, "data": data}, default=str))
+        print(f"📣 Published live '{event_type}' update to {receivers} web workers.")
+    except redis.RedisError as e:
+        print(f"⚠️ Could not publish live '{event_type}' update: {e}")
+
+
+class LiveHub:
+    """
+    One Redis subscription per worker process, fanned out to a bounded queue per open stream.
+    A client whose queue fills up (slow connection) has its backlog dropped and gets a single
+    'resync' event instead, so one slow reader can't grow memory or hold up the others.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, max_clients=None):
+        """A new stream's queue, or None when `max_clients` streams are already open in this process."""
+        client_queue = queue.Queue(maxsize=Config.LIVE_CLIENT_QUEUE_SIZE)
+        with self._lock:
+            if max_clients is not None and len(self._clients) >= max_clients:
+                return None
+            self._clients.add(client_queue)
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="live-hub", daemon=True)
+                self._listener.start()
+        return client_queue
+
+    def unsubscribe(self, client_queue):
+        with self._lock:
+            self._clients.discard(client_queue)
+
+    def _listen(self):
+        while True:
+            try:
+                # Dedicated connection without a read timeout: the subscription is idle between pipeline runs
+                client = redis.Redis.from_url(Config.REDIS_URL, socket_connect_timeout=2, health_check_interval=30)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                print(f"📡 Live hub subscribed to {self.channel}.")
+                for message in pubsub.listen():
+                    self._broadcast(json.loads(message["data"]))
+            except (redis.RedisError, ValueError) as e:
+                print(f"⚠️ Live hub subscription lost, retrying in 5s: {e}")
+                time.sleep(5)
+
+    def _broadcast(self, event):
+        with self._lock:
+            clients = list(self._clients)
+        for client_queue in clients:
+            try:
+                client_queue.put_nowait(event)
+            except queue.Full:
+                with client_queue.mutex:
+                    client_queue.queue.clear()
+                client_queue.put_nowait(RESYNC_EVENT)
+
+
+hub = LiveHub(LIVE_CHANNEL)
+
+
+def _format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+@live.route("/live/stream")
+@login_required
+def stream():
+    """
+    Server-Sent Events for an open dashboard: watchlist prices, new strategy hits, new trending headlines.
+    Streams end after LIVE_STREAM_MAX_SECONDS so worker threads are recycled; EventSource reconnects.
+    Each stream holds a worker thread, so past LIVE_MAX_STREAMS per process the answer is 204: EventSource
+    stops reconnecting and the dashboard polls /api/watchlist every LIVE_POLL_SECONDS instead.
+    """
+    client_queue = hub.subscribe(max_clients=Config.LIVE_MAX_STREAMS)
+    if client_queue is None:
+        print(f"🚦 {Config.LIVE_MAX_STREAMS} live streams already open in this worker, sending the client to polling.")
+        return Response(status=204, headers={"Retry-After": str(Config.LIVE_POLL_SECONDS)})
+
+    try:
+        watchlist = {row.stock_symbol for row in UserSavedStock.query.filter_by(user_id=current_user.id).all()}
+    except Exception:
+        hub.unsubscribe(client_queue)
+        raise
+    db.session.remove()  # Don't hold a pooled connection for the life of the stream
+
+    def events():
+        started = time.monotonic()
+        try:
+            yield "retry: 5000\n\n"
+            while time.monotonic() - started < Config.LIVE_STREAM_MAX_SECONDS:
+                try:
+                    event = client_queue.get(timeout=Config.LIVE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if event["type"] == "prices":
+                    prices = {symbol: quote for symbol, quote in event["data"].items() if symbol in watchlist}
+                    if not prices:
+                        continue
+                    event = {"type": "prices", "data": prices}
+
+                yield _format_event(event)
+        finally:
+            hub.unsubscribe(client_queue)
+
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
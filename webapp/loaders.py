@@ -0,0 +1,74 @@
+from collections import defaultdict
+from sqlalchemy import func
+from config import Config
+from stock_history import get_price_history, get_price_trends
+from . import db
+from .models import StockData, StockNews
+
+
+def load_stocks_by_symbol(symbols):
+    """Returns {symbol: StockData} for all requested symbols with a single IN query."""
+    if not symbols:
+        return {}
+    stocks = StockData.query.filter(StockData.symbol.in_(list(symbols))).all()
+    return {stock.symbol: stock for stock in stocks}
+
+
+def load_latest_news_by_symbol(symbols, per_symbol=3, exclude_trending=False):
+    """
+    Returns {symbol: [StockNews, ...]} with the newest `per_symbol` articles for each symbol, newest first.
+    One ROW_NUMBER() query regardless of how many symbols are requested.
+    """
+    if not symbols:
+        return {}
+
+    filters = [StockNews.symbol.in_(list(symbols))]
+    if exclude_trending:
+        filters.append(StockNews.rankscore.is_(None))
+
+    ranked = db.session.query(
+        StockNews.id,
+        func.row_number().over(
+            partition_by=StockNews.symbol,
+            order_by=(StockNews.date_published.desc(), StockNews.id.desc())
+        ).label("rn")
+    ).filter(*filters).subquery()
+
+    rows = StockNews.query.join(ranked, StockNews.id == ranked.c.id)\
+        .filter(ranked.c.rn <= per_symbol)\
+        .order_by(StockNews.symbol, ranked.c.rn)\
+        .all()
+
+    news = defaultdict(list)
+    for article in rows:
+        news[article.symbol].append(article)
+    return dict(news)
+
+
+def sparkline_points(closes, width=80, height=24):
+    """SVG polyline points for a series of closes, scaled to fill a width x height box."""
+    if len(closes) < 2:
+        return ""
+    low, high = min(closes), max(closes)
+    span = (high - low) or 1
+    step = width / (len(closes) - 1)
+    return " ".join(f"{i * step:.1f},{height - (close - low) / span * height:.1f}" for i, close in enumerate(closes))
+
+
+def load_price_history_by_symbol(symbols):
+    """
+    Returns {symbol: {"closes": [...], "sparkline": "<svg points>", "trend": % or None}} from
+    stock_daily_history: one windowed query for the sparkline closes and one for the N-day trend.
+    """
+    if not symbols:
+        return {}
+    closes = get_price_history(list(symbols), days=Config.WATCHLIST_SPARKLINE_DAYS)
+    trends = get_price_trends(list(symbols), days=Config.WATCHLIST_TREND_DAYS)
+    return {
+        symbol: {
+            "closes": closes.get(symbol, []),
+            "sparkline": sparkline_points(closes.get(symbol, [])),
+            "trend": trends.get(symbol),
+        }
+        for symbol in symbols
+    }
@@ -0,0 +1,252 @@
+import os
+import re
+import time
+import threading
+from bisect import bisect_left
+from collections import defaultdict, deque
+from flask import Blueprint, Response, abort, g, has_request_context, request, before_render_template, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import Config
+
+metrics = Blueprint('metrics', __name__)
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW_QUANTILES = (0.5, 0.95, 0.99)
+MAX_LOGGED_STATEMENT = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestStats:
+    """What one request spent: SQL statements and time, the slowest statement, template rendering."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.slow_queries = 0
+        self.slowest = None  # (seconds, statement, redacted parameters)
+
+
+class Histogram:
+    """Cumulative Prometheus buckets plus the last `window` observations for rolling quantiles."""
+
+    def __init__(self, window):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.buckets[bisect_left(DURATION_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def quantile(self, q):
+        values = sorted(self.recent)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class EndpointMetrics:
+    """
+    Per-endpoint request metrics for this worker process. Each gunicorn worker keeps its own copy
+    (series carry a `pid` label), so a scrape reflects the worker that answered it.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self.requests = defaultdict(lambda: Histogram(self.window))
+        self.db = defaultdict(lambda: Histogram(self.window))
+        self.statements = defaultdict(int)
+        self.template_seconds = defaultdict(float)
+        self.slow_queries = defaultdict(int)
+
+    def record(self, endpoint, stats, total_seconds):
+        with self._lock:
+            self.requests[endpoint].observe(total_seconds)
+            self.db[endpoint].observe(stats.db_seconds)
+            self.statements[endpoint] += stats.statements
+            self.template_seconds[endpoint] += stats.template_seconds
+            self.slow_queries[endpoint] += stats.slow_queries
+
+    def render_prometheus(self):
+        pid = os.getpid()
+        lines = []
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for endpoint, hist in sorted(series.items()):
+                labels = f'endpoint="{endpoint}",pid="{pid}"'
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, hist.buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name, help_text, series, fmt="{}"):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for endpoint, value in sorted(series.items()):
+                lines.append(f'{name}{{endpoint="{endpoint}",pid="{pid}"}} {fmt.format(value)}')
+
+        with self._lock:
+            histogram("app_request_duration_seconds", "Total request handling time.", self.requests)
+            histogram("app_request_db_seconds", "Time spent in SQL statements per request.", self.db)
+            counter("app_request_sql_statements_total", "SQL statements executed by requests.", self.statements)
+            counter("app_request_template_seconds_total", "Time spent rendering templates.",
+                    self.template_seconds, "{:.6f}")
+            counter("app_slow_queries_total", f"Statements slower than {Config.SLOW_QUERY_MS}ms.", self.slow_queries)
+
+            lines.append(f"# HELP app_request_duration_window_seconds Request time quantiles over the last "
+                         f"{self.window} requests per endpoint.")
+            lines.append("# TYPE app_request_duration_window_seconds gauge")
+            for endpoint, hist in sorted(self.requests.items()):
+                for q in WINDOW_QUANTILES:
+                    lines.append(f'app_request_duration_window_seconds{{endpoint="{endpoint}",pid="{pid}",'
+                                 f'quantile="{q}"}} {hist.quantile(q):.6f}')
+
+        return "\n".join(lines) + "\n"
+
+
+endpoint_metrics = EndpointMetrics(Config.METRICS_WINDOW_SIZE)
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters, executemany=False):
+    """Bound parameters with every value replaced by its type (and length), safe to log."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "request_stats" in g:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and "request_stats" in g):
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    stats = g.request_stats
+    stats.statements += 1
+    stats.db_seconds += elapsed
+
+    is_slowest = stats.slowest is None or elapsed > stats.slowest[0]
+    is_slow = elapsed * 1000 >= Config.SLOW_QUERY_MS
+    if not (is_slowest or is_slow):
+        return
+
+    params = redact_parameters(parameters, executemany)
+    if is_slowest:
+        stats.slowest = (elapsed, statement, params)
+    if is_slow:
+        stats.slow_queries += 1
+        print(f"🐢 Slow query ({elapsed * 1000:.0f}ms) in {request.method} {request.path} [{_endpoint()}]: "
+              f"{_one_line(statement)} | params={params}")
+
+
+def _one_line(statement):
+    return _WHITESPACE.sub(" ", statement).strip()[:MAX_LOGGED_STATEMENT]
+
+
+def _before_template(sender, template, context, **extra):
+    if "request_stats" in g:
+        g.setdefault("template_started", []).append(time.perf_counter())
+
+
+def _after_template(sender, template, context, **extra):
+    started = g.get("template_started")
+    if started and "request_stats" in g:
+        g.request_stats.template_seconds += time.perf_counter() - started.pop()
+
+
+def _server_timing(stats, total_seconds):
+    slowest = stats.slowest[0] if stats.slowest else 0.0
+    return ", ".join([
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries"',
+        f'sqlmax;dur={slowest * 1000:.1f};desc="slowest statement"',
+        f"tpl;dur={stats.template_seconds * 1000:.1f}",
+        f"total;dur={total_seconds * 1000:.1f}",
+    ])
+
+
+def init_request_metrics(app):
+    """
+    Times every request: SQL statement count and time (engine events), the slowest statement,
+    template rendering and the total. Adds a Server-Timing header, feeds the per-endpoint
+    histograms behind /metrics and logs statements slower than SLOW_QUERY_MS with their route.
+    SQL_STATEMENT_HEADER=1 also adds X-SQL-Statements and X-SQL-Slowest (used by loadtest.py).
+    """
+    if not app.config.get("REQUEST_METRICS_ENABLED"):
+        return
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_template, app)
+    template_rendered.connect(_after_template, app)
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def finish_request_stats(response):
+        stats = g.get("request_stats")
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        endpoint_metrics.record(_endpoint(), stats, total)
+
+        response.headers["Server-Timing"] = _server_timing(stats, total)
+        if app.config.get("SQL_STATEMENT_HEADER"):
+            response.headers["X-SQL-Statements"] = str(stats.statements)
+            if stats.slowest:
+                response.headers["X-SQL-Slowest"] = f"{stats.slowest[0] * 1000:.1f}ms {_one_line(stats.slowest[1])[:200]}"
+        return response
+
+
+def _is_metrics_client():
+    token = Config.METRICS_TOKEN
+    if token and request.headers.get("Authorization") == f"Bearer {token}":
+        return True
+    return current_user.is_authenticated and current_user.email.lower() in Config.ADMIN_EMAILS
+
+
+@metrics.route("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of this worker's request metrics. Admins (ADMIN_EMAILS) or METRICS_TOKEN only."""
+    if not _is_metrics_client():
+        abort(404)
+    return Response(endpoint_metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
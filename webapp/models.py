@@ -34,7 +34,7 @@ class StockNews(db.Model):
     source = db.Column(db.String(255), nullable=False)
     rankscore = db.Column(db.Float, nullable=True)
     news_type = db.Column(db.String(50), nullable=True)  # e.g., "Breaking", "Market Update"
-    date_published = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    date_published = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     url = db.Column(db.String(500), nullable=False)
 
     def __repr__(self):
@@ -61,6 +61,10 @@ class StockData(db.Model):
 
     # ✅ Store summary inside StockData instead of separate model
     summary_text = db.Column(db.Text, nullable=True)
+    # Rendered from summary_text when it's saved, so readers never re-run the markdown conversion
+    summary_html = db.Column(db.Text, nullable=True)
+    summary_html_no_headings = db.Column(db.Text, nullable=True)
+    summary_fingerprint = db.Column(db.String(64), nullable=True)  # inputs the current summary was written from
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
@@ -74,4 +78,110 @@ class UserSavedStock(db.Model):
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship('User', backref=db.backref('saved_stocks', lazy=True))
-    stock = db.relationship('StockData', backref=db.backref('saved_by_users', lazy=True))
\ No newline at end of file
+    stock = db.relationship('StockData', backref=db.backref('saved_by_users', lazy=True))
+
+class StockDailyHistory(db.Model):
+    """Append-only, one row per symbol per trading day. Partitioned by month on Postgres."""
+    __tablename__ = 'stock_daily_history'
+
+    symbol = db.Column(db.String(10), primary_key=True)
+    trading_date = db.Column(db.Date, primary_key=True, index=True)
+    open = db.Column(db.Float, nullable=True)
+    high = db.Column(db.Float, nullable=True)
+    low = db.Column(db.Float, nullable=True)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.BigInteger, nullable=True)
+    change_percent = db.Column(db.Float, nullable=True)
+    rsi = db.Column(db.Float, nullable=True)
+    macd = db.Column(db.Float, nullable=True)
+    macd_signal = db.Column(db.Float, nullable=True)
+    macd_histogram = db.Column(db.Float, nullable=True)
+    rvol = db.Column(db.Float, nullable=True)
+    support = db.Column(db.Float, nullable=True)
+    resistance = db.Column(db.Float, nullable=True)
+    tags_mask = db.Column(db.Integer, nullable=False, default=0)  # bitmask, see stock_history.STRATEGY_TAG_BITS
+    strategy_label = db.Column(db.String(100), nullable=True)
+    confidence_score = db.Column(db.Float, nullable=True)
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DashboardSection(db.Model):
+    """Precomputed shared dashboard sections, rebuilt by the pipeline and read by /home."""
+    __tablename__ = 'dashboard_section'
+
+    section = db.Column(db.String(50), primary_key=True)  # e.g. "trending_news", "gainers"
+    payload = db.Column(db.JSON, nullable=False)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TickerReference(db.Model):
+    """Local copy of the exchange ticker list, used to validate symbols without a live API call."""
+    __tablename__ = 'ticker_reference'
+
+    symbol = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(200), nullable=True)
+    exchange = db.Column(db.String(20), nullable=True)  # e.g. "XNAS", "XNYS"
+    type = db.Column(db.String(10), nullable=True)  # e.g. "CS", "ETF", "ADRC"
+    market_cap = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SummaryCache(db.Model):
+    """LLM stock summaries keyed by a fingerprint of their material inputs (see summary_cache.py)."""
+    __tablename__ = 'summary_cache'
+
+    fingerprint = db.Column(db.String(64), primary_key=True)  # sha256 of symbol + bucketed inputs
+    symbol = db.Column(db.String(10), nullable=False, index=True)
+    summary_text = db.Column(db.Text, nullable=False)
+    summary_html = db.Column(db.Text, nullable=True)
+    summary_html_no_headings = db.Column(db.Text, nullable=True)
+    tokens = db.Column(db.Integer, nullable=True)  # prompt + completion tokens the summary cost
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class MarketDigest(db.Model):
+    """Compact structured digest of one day's market recap, written by the daily job and read by the weekly report."""
+    __tablename__ = 'market_digest'
+
+    trading_date = db.Column(db.Date, primary_key=True)
+    sentiment = db.Column(db.String(20), nullable=True)  # "Bullish", "Bearish", "Neutral" or "Mixed"
+    payload = db.Column(db.JSON, nullable=False)  # see market_digest.build_digest
+    tokens = db.Column(db.Integer, nullable=True)  # tokens the digest adds to the weekly prompt
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LLMCall(db.Model):
+    """One chat completion (or summary cache hit) made by the pipeline, for cost and latency reporting (llm_telemetry.py)."""
+    __tablename__ = 'llm_call'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(32), nullable=True, index=True)
+    stage = db.Column(db.String(50), nullable=False)  # e.g. "stock_summaries", "daily_recap"
+    request_key = db.Column(db.String(255), nullable=True)  # symbol, comma-separated batch of symbols, or theme
+    model = db.Column(db.String(50), nullable=True)
+    prompt_tokens = db.Column(db.Integer, nullable=False, default=0)
+    completion_tokens = db.Column(db.Integer, nullable=False, default=0)
+    cost_usd = db.Column(db.Float, nullable=False, default=0.0)
+    latency_ms = db.Column(db.Float, nullable=True)  # time in the API, retries included
+    queue_wait_ms = db.Column(db.Float, nullable=True)  # time waiting for the scheduler
+    retries = db.Column(db.Integer, nullable=False, default=0)
+    cache_hit = db.Column(db.Boolean, nullable=False, default=False)
+    succeeded = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class LLMRun(db.Model):
+    """Rollup of one pipeline run's LLM calls, written when the run finishes."""
+    __tablename__ = 'llm_run'
+
+    run_id = db.Column(db.String(32), primary_key=True)
+    name = db.Column(db.String(50), nullable=False)  # "daily", "weekly"
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    calls = db.Column(db.Integer, nullable=False, default=0)
+    failed_calls = db.Column(db.Integer, nullable=False, default=0)
+    cache_hits = db.Column(db.Integer, nullable=False, default=0)
+    retries = db.Column(db.Integer, nullable=False, default=0)
+    prompt_tokens = db.Column(db.Integer, nullable=False, default=0)
+    completion_tokens = db.Column(db.Integer, nullable=False, default=0)
+    cost_usd = db.Column(db.Float, nullable=False, default=0.0)
+    newsletters = db.Column(db.Integer, nullable=True)  # emails sent by the run
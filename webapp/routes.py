@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, jsonify, current_app, session
 from flask_login import login_user, login_required, current_user
 from flask_login import logout_user
-from .models import User, StockNews, StockData, UserSavedStock
+from .models import User, StockData, UserSavedStock
 from . import db, bcrypt
 from .forms import SignUpForm, LoginForm, ResetPasswordForm, ForgotPasswordForm, ContactForm
 import stripe
@@ -15,9 +15,14 @@ from flask_mail import Message
 import string
 import random
 from . import sg, mail
+from .db_routing import read_only
+from .dashboard import get_dashboard_fragments
+from .tickers import is_known_ticker
+from .jobs import enqueue_snapshot_fetch, get_snapshot_status, set_snapshot_status
+from .user_cache import invalidate_user
+from .loaders import load_stocks_by_symbol, load_latest_news_by_symbol, load_price_history_by_symbol
 import secrets  # For better cryptographic token generation
-from markdown import convert_markdown_to_html
-import re
+from markdown import render_summary_html
 import time
 import os
 
@@ -34,6 +39,7 @@ def profile():
     return render_template("profile.html", user=current_user)
 
 @routes.route('/home')
+@read_only
 def home():
     if not current_user.is_authenticated:
         return redirect(url_for('routes.landing'))  # Redirect guests to landing page
@@ -41,76 +47,39 @@ def home():
      # ✅ Pull and clear the session flag for a new paid user
     new_signup = session.pop('new_signup', False)
 
-    today = datetime.utcnow().date()
-    strategy_stocks = StockData.query.filter(
-        StockData.category == "strategy",
-        db.func.date(StockData.last_updated) == today
-    ).order_by(StockData.strategy_score.desc()).all()
-    
-    # Group by strategy_label
-    grouped = {}
-    for stock in strategy_stocks:
-        label = stock.strategy_label or "Unlabeled"
-        if label not in grouped:
-            grouped[label] = []
-        grouped[label].append(stock)
-
-    # Trending news first (rankscore is present)
-    trending_news = StockNews.query.filter(StockNews.rankscore.isnot(None))\
-        .order_by(StockNews.rankscore.desc(), StockNews.date_published.desc()).all()
-
-
-    # Stock-specific news (no rankscore)
-    stock_news = StockNews.query.filter(StockNews.rankscore.is_(None))\
-        .order_by(StockNews.date_published.desc()).all() 
-    
-    gainers = StockData.query.filter(StockData.category.contains("gainer")).order_by(StockData.change_percent.desc()).limit(5).all()
-    losers = StockData.query.filter(StockData.category.contains("loser")).order_by(StockData.change_percent).limit(5).all()   
-    market_data = StockData.query.filter_by(category="market").order_by(StockData.change_percent.desc()).limit(10).all()
-    top_traded = StockData.query.filter(StockData.category.contains("top_traded")).order_by(StockData.volume.desc()).all()
+    # Everything except the watchlist is shared HTML, cached per data version (see webapp/dashboard.py)
+    fragments = get_dashboard_fragments()
+
     saved_stocks = UserSavedStock.query.filter_by(user_id=current_user.id).all()
     stocks_list = [stock.stock_symbol for stock in saved_stocks]
 
-    # Fetch StockData for each saved stock
+    # Watchlist data in a fixed number of queries: one IN for StockData, one windowed query for news,
+    # two windowed queries over stock_daily_history for the sparklines and trends
+    saved_stock_data = load_stocks_by_symbol(stocks_list)
+    saved_stock_news = load_latest_news_by_symbol(stocks_list, per_symbol=10)
+    saved_stock_history = load_price_history_by_symbol(stocks_list)
+
     user_stocks_data = {}
     for symbol in stocks_list:
-        stock_data = StockData.query.filter_by(symbol=symbol).first()
+        stock_data = saved_stock_data.get(symbol)
         if stock_data:
-            # Get latest news (limit 3 per stock)
-            stock_news = StockNews.query.filter_by(symbol=symbol)\
-                .order_by(StockNews.date_published.desc()).limit(10).all()
-
             user_stocks_data[symbol] = {
                 "price": stock_data.price,
                 "change_percent": stock_data.change_percent,
                 "volume": stock_data.volume,
                 "summary": stock_data.summary_text,
-                "news": stock_news
+                "news": saved_stock_news.get(symbol, []),
+                "sparkline": saved_stock_history[symbol]["sparkline"],
+                "trend": saved_stock_history[symbol]["trend"],
             }
 
-   # Stock news dictionary for top-traded stocks
-    stock_news_dict = {}
-    for stock in top_traded:
-        stock_news_dict[stock.symbol] = StockNews.query.filter(
-            StockNews.symbol.ilike(f"%{stock.symbol}%"),  # Match stock symbol
-            StockNews.rankscore.is_(None)  # Exclude trending news
-        ).order_by(StockNews.date_published.desc()).limit(3).all()
-
-    user = User.query.filter_by(id=current_user.id).first()
-    subscription_status = user.subscription_status  # 'active', 'inactive', or 'canceled'
+    subscription_status = current_user.subscription_status  # 'active', 'inactive', or 'canceled'
 
     return render_template(
         'home.html',
-        grouped=grouped,
+        fragments=fragments,
         stocks_list=stocks_list,
         user_stocks_data=user_stocks_data,
-        trending_news=trending_news,
-        market_data=market_data,
-        stock_news=stock_news,
-        stock_news_dict=stock_news_dict,
-        gainers=gainers,
-        losers=losers,
-        top_traded=top_traded,
         user=current_user,
         subscription_status=subscription_status,
         new_signup=new_signup)
@@ -235,6 +204,7 @@ def success():
     user.stripe_customer_id = checkout_session.customer
     user.subscription_status = "active"
     db.session.commit()
+    invalidate_user(user.id)
 
     # Log the user in automatically if they are not already logged in
     if not current_user.is_authenticated:
@@ -267,6 +237,7 @@ def cancel_subscription():
         if user.subscription_status == 'free':
             user.subscription_status = 'inactive'
             db.session.commit()
+            invalidate_user(user.id)
             flash("You've been unsubscribed from daily emails.", 'info')
             return redirect(url_for('routes.home'))
 
@@ -289,6 +260,7 @@ def cancel_subscription():
                     # Update the user's subscription status in the database to 'inactive'
                     user.subscription_status = 'inactive'  # Or 'canceled' if you prefer
                     db.session.commit()  # Commit the changes to the database
+                    invalidate_user(user.id)
 
                     flash('Your subscription has been canceled successfully.', 'success')
 
@@ -347,6 +319,7 @@ def stripe_webhook():
             # Mark the user as inactive in your database
             user.subscription_status = 'inactive'  # Or 'canceled' depending on your preference
             db.session.commit()  # Commit the change to the database
+            invalidate_user(user.id)
             print(f"Subscription canceled for {user.email}")  # You can also log this if needed
         else:
             print(f"User not found for customer ID {customer_id}")
@@ -419,6 +392,7 @@ def reset_password(token):
         user.reset_token = None  # Clear the reset token after resetting the password
         user.reset_token_expiration = None  # Clear the expiration
         db.session.commit()
+        invalidate_user(user.id)
 
         flash('Your password has been updated!', 'success')
         return redirect(url_for('routes.login'))
@@ -429,45 +403,68 @@ def reset_password(token):
 @routes.route("/save_stock", methods=["POST"])
 @login_required
 def save_stock():
-    from webapp.models import db, StockData, UserSavedStock
-    from daily_data import get_stock_snapshot
     data = request.get_json()
     symbol = data.get("symbol", "").upper().strip()
 
     if not symbol:
         return jsonify({"message": "Stock symbol is required."}), 400
 
-    with current_app.app_context():
-        # ✅ Check stock count limit
-        max_stocks_allowed = 5
-        user_stock_count = UserSavedStock.query.filter_by(user_id=current_user.id).count()
-
-        if user_stock_count >= max_stocks_allowed:
-            return jsonify({
-                "message": f"You can only track up to {max_stocks_allowed} stocks. Please remove one before adding more."
-            }), 400
-
-        stock_entry = StockData.query.filter_by(symbol=symbol).first()
-
-        if not stock_entry:
-            print(f"⚠️ {symbol} not found in StockData. Fetching snapshot...")
-            snapshot = get_stock_snapshot(symbol)
+    # ✅ Check stock count limit
+    max_stocks_allowed = Config.MAX_SAVED_STOCKS
+    user_stock_count = UserSavedStock.query.filter_by(user_id=current_user.id).count()
+
+    if user_stock_count >= max_stocks_allowed:
+        return jsonify({
+            "message": f"You can only track up to {max_stocks_allowed} stocks. Please remove one before adding more."
+        }), 400
+
+    if not is_known_ticker(symbol):
+        return jsonify({"message": f"{symbol} is not a recognized ticker."}), 404
+
+    existing_saved_stock = UserSavedStock.query.filter_by(user_id=current_user.id, stock_symbol=symbol).first()
+    if existing_saved_stock:
+        return jsonify({"message": "Stock already saved.", "status": "ready"}), 200
+
+    if not StockData.query.filter_by(symbol=symbol).first():
+        # ⏳ No data yet: the worker fetches the snapshot + news and then saves it to the list. If no worker
+        # is up the task waits in the broker until one starts; only a broker outage is an error here.
+        try:
+            enqueue_snapshot_fetch(current_user.id, symbol)
+        except Exception as e:
+            print(f"❌ Could not queue snapshot fetch for {symbol}: {e}")
+            set_snapshot_status(current_user.id, symbol, "failed")
+            return jsonify({"message": f"Couldn't add {symbol} right now. Please try again shortly."}), 503
+
+        print(f"📨 Queued snapshot fetch for {symbol} (user {current_user.id})")
+        return jsonify({
+            "message": f"Fetching data for {symbol}...",
+            "status": "pending",
+            "status_url": url_for('routes.save_stock_status', symbol=symbol),
+        }), 202
+
+    saved_stock = UserSavedStock(user_id=current_user.id, stock_symbol=symbol, date_added=datetime.now(timezone.utc))
+    db.session.add(saved_stock)
+    db.session.commit()
 
-            if not snapshot:
-                return jsonify({"message": f"Stock {symbol} could not be found or fetched."}), 404
+    print(f"✅ Stock {symbol} saved for user {current_user.id}")
+    return jsonify({"message": f"Stock {symbol} saved successfully.", "status": "ready"}), 200
 
-            stock_entry = StockData.query.filter_by(symbol=symbol).first()
 
-        existing_saved_stock = UserSavedStock.query.filter_by(user_id=current_user.id, stock_symbol=symbol).first()
-        if existing_saved_stock:
-            return jsonify({"message": "Stock already saved."}), 200
+@routes.route("/save_stock/status/<symbol>")
+@login_required
+def save_stock_status(symbol):
+    """Polled after a 202 from /save_stock: 'ready' once the worker has saved the stock."""
+    symbol = symbol.upper().strip()
 
-        saved_stock = UserSavedStock(user_id=current_user.id, stock_symbol=symbol, date_added=datetime.now(timezone.utc))
-        db.session.add(saved_stock)
-        db.session.commit()
+    if UserSavedStock.query.filter_by(user_id=current_user.id, stock_symbol=symbol).first():
+        return jsonify({"status": "ready", "message": f"Stock {symbol} saved successfully."})
 
-        print(f"✅ Stock {symbol} saved for user {current_user.id}")
-        return jsonify({"message": f"Stock {symbol} saved successfully."}), 200
+    status = get_snapshot_status(current_user.id, symbol)
+    if status == "failed":
+        return jsonify({"status": "failed", "message": f"Stock {symbol} could not be found or fetched."})
+    if status == "pending":
+        return jsonify({"status": "pending"})
+    return jsonify({"status": "unknown"}), 404
 
     
 @routes.route("/remove_stock", methods=["POST"])
@@ -490,13 +487,16 @@ def remove_stock():
     return jsonify({"message": f"Stock {stock_symbol} removed successfully"}), 200
 
 @routes.route("/landing_snapshot/<symbol>")
+@read_only
 def landing_snapshot(symbol):
     stock = StockData.query.filter_by(symbol=symbol.upper()).first()
     if not stock:
         return jsonify({"error": "Stock not found"}), 404
 
-    raw_html = convert_markdown_to_html(stock.summary_text or "")
-    stripped_html = re.sub(r'<h[1-6][^>]*>.*?</h[1-6]>', '', raw_html, flags=re.DOTALL)
+    # Rendered when the summary was saved; rows not yet backfilled are rendered on the fly
+    stripped_html = stock.summary_html_no_headings
+    if stripped_html is None:
+        stripped_html = render_summary_html(stock.summary_text)[1]
 
     return jsonify({
         "symbol": stock.symbol,
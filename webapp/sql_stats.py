@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+class StatementCounter:
+    """Collects every SQL statement an engine executes while attached."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_statements(engine):
+    """
+    Counts SQL statements sent through `engine` inside the block:
+
+        with count_statements(db.engine) as counter:
+            client.get("/home")
+        assert counter.count == expected
+    """
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._on_execute)
@@ -0,0 +1,102 @@
+import re
+import time
+import threading
+from bisect import bisect_left
+from config import Config
+from . import db
+from .models import TickerReference
+
+SYMBOL_FORMAT = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+
+class TickerIndex:
+    """
+    In-process copy of ticker_reference as sorted parallel tuples (~12k tickers, a couple of MB).
+    Symbol lookups and prefix searches are bisects; the whole index is swapped in one assignment on
+    reload, so readers never need a lock. Reloaded from the table every TICKER_INDEX_TTL seconds
+    because the daily job runs in another process.
+    """
+
+    def __init__(self):
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._data = ((), (), (), ())  # symbols, names, lowercase names (sorted), symbol index per sorted name
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < Config.TICKER_INDEX_TTL:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < Config.TICKER_INDEX_TTL:
+                return
+            self.reload()
+
+    def reload(self):
+        rows = db.session.query(TickerReference.symbol, TickerReference.name)\
+            .order_by(TickerReference.symbol).all()
+        symbols = tuple(symbol for symbol, _ in rows)
+        names = tuple(name or "" for _, name in rows)
+        by_name = sorted((name.lower(), i) for i, name in enumerate(names) if name)
+        self._data = (symbols, names, tuple(name for name, _ in by_name), tuple(i for _, i in by_name))
+        self._loaded_at = time.monotonic()
+        print(f"🔠 Loaded ticker index with {len(symbols)} symbols.")
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._data[0])
+
+    def get_name(self, symbol):
+        self._ensure_loaded()
+        symbols, names, _, _ = self._data
+        i = bisect_left(symbols, symbol)
+        if i < len(symbols) and symbols[i] == symbol:
+            return names[i] or None
+        return None
+
+    def contains(self, symbol):
+        self._ensure_loaded()
+        symbols = self._data[0]
+        i = bisect_left(symbols, symbol)
+        return i < len(symbols) and symbols[i] == symbol
+
+    def search(self, prefix, limit=10):
+        """Symbols starting with `prefix` first, then companies whose name starts with it."""
+        self._ensure_loaded()
+        symbols, names, sorted_names, name_index = self._data
+
+        results = []
+        seen = set()
+        symbol_prefix = prefix.upper()
+        i = bisect_left(symbols, symbol_prefix)
+        while i < len(symbols) and len(results) < limit and symbols[i].startswith(symbol_prefix):
+            results.append({"symbol": symbols[i], "name": names[i]})
+            seen.add(i)
+            i += 1
+
+        name_prefix = prefix.lower()
+        j = bisect_left(sorted_names, name_prefix)
+        while j < len(sorted_names) and len(results) < limit and sorted_names[j].startswith(name_prefix):
+            k = name_index[j]
+            if k not in seen:
+                results.append({"symbol": symbols[k], "name": names[k]})
+                seen.add(k)
+            j += 1
+
+        return results
+
+
+ticker_index = TickerIndex()
+
+
+def is_known_ticker(symbol):
+    """
+    Validates a symbol against the in-process ticker index (no database or API call on the hot path).
+    Until the reference list has been loaded, any well-formed symbol is accepted.
+    """
+    if not SYMBOL_FORMAT.match(symbol):
+        return False
+    return ticker_index.contains(symbol) or len(ticker_index) == 0
+
+
+def ticker_name(symbol):
+    """Company name from the reference list, or None if unknown."""
+    return ticker_index.get_name(symbol)
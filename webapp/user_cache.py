@@ -0,0 +1,70 @@
+import json
+import redis
+from flask_login import UserMixin
+from config import Config
+from . import db
+from .cache import get_redis, _mark_down
+from .models import User
+
+USER_KEY_PREFIX = "user:"
+CACHED_FIELDS = ("id", "email", "subscription_status", "stripe_customer_id")
+
+
+class CachedUser(UserMixin):
+    """
+    What views and templates read from current_user, without the ORM row. Handlers that change a
+    user (checkout success, cancellation, webhook, password reset) load the User model themselves.
+    """
+
+    def __init__(self, id, email, subscription_status, stripe_customer_id):
+        self.id = id
+        self.email = email
+        self.subscription_status = subscription_status
+        self.stripe_customer_id = stripe_customer_id
+
+    def get_id(self):
+        return str(self.id)
+
+
+def _key(user_id):
+    return f"{USER_KEY_PREFIX}{user_id}"
+
+
+def load_cached_user(user_id):
+    """
+    Flask-Login user loader: the user's session fields from Redis, falling back to one primary-key
+    query that refills the cache for USER_CACHE_TTL seconds.
+    """
+    user_id = int(user_id)
+    client = get_redis()
+    if client is not None:
+        try:
+            payload = client.get(_key(user_id))
+            if payload:
+                return CachedUser(**json.loads(payload))
+        except redis.RedisError as e:
+            _mark_down(e)
+            client = None
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+
+    fields = {field: getattr(user, field) for field in CACHED_FIELDS}
+    if client is not None:
+        try:
+            client.set(_key(user_id), json.dumps(fields), ex=Config.USER_CACHE_TTL)
+        except redis.RedisError as e:
+            _mark_down(e)
+    return CachedUser(**fields)
+
+
+def invalidate_user(user_id):
+    """Drops the cached copy after a commit that changed the user; the next request reloads it."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.delete(_key(user_id))
+    except redis.RedisError as e:
+        _mark_down(e)